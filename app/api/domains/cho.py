@@ -17,7 +17,6 @@ from typing import Literal
 from typing import TypedDict
 from zoneinfo import ZoneInfo
 
-import bcrypt
 import databases.core
 from fastapi import APIRouter
 from fastapi import Response
@@ -68,9 +67,8 @@ from app.repositories import ingame_logins as logins_repo
 from app.repositories import mail as mail_repo
 from app.repositories import users as users_repo
 from app.state import services
-from app.usecases.performance import ScoreParams
-
-OSU_API_V2_CHANGELOG_URL = "https://osu.ppy.sh/api/v2/changelog"
+from app.usecases import client_versions as client_versions_usecases
+from app.usecases import passwords as passwords_usecases
 
 BEATMAPS_PATH = Path.cwd() / ".data/osu"
 DISK_CHAT_LOG_FILE = ".data/logs/chat.log"
@@ -285,6 +283,9 @@ class ChangeAction(BasePacket):
         self.map_id = reader.read_i32()
 
     async def handle(self, player: Player) -> None:
+        # the presence packet only depends on the mode of the status.
+        mode_changed = player.status.mode != self.mode
+
         # update the user's status.
         player.status.action = Action(self.action)
         player.status.info_text = self.info_text
@@ -292,10 +293,11 @@ class ChangeAction(BasePacket):
         player.status.mods = Mods(self.mods)
         player.status.mode = GameMode(self.mode)
         player.status.map_id = self.map_id
+        player.invalidate_packets(presence=mode_changed)
 
         # broadcast it to all online players.
         if not player.restricted:
-            app.state.sessions.players.enqueue(app.packets.user_stats(player))
+            app.state.sessions.players.enqueue(player.stats_packet)
 
 
 IGNORED_CHANNELS = ["#highlight", "#userlog"]
@@ -458,7 +460,7 @@ class Logout(BasePacket):
 @register(ClientPackets.REQUEST_STATUS_UPDATE, restricted=True)
 class StatsUpdateRequest(BasePacket):
     async def handle(self, player: Player) -> None:
-        player.enqueue(app.packets.user_stats(player))
+        player.enqueue(player.stats_packet)
 
 
 # Some messages to send on welcome/restricted/etc.
@@ -563,41 +565,6 @@ def parse_osu_version_string(osu_version_string: str) -> OsuVersion | None:
     return osu_version
 
 
-async def get_allowed_client_versions(osu_stream: OsuStream) -> set[date] | None:
-    """
-    Return a list of acceptable client versions for the given stream.
-
-    This is used to determine whether a client is too old to connect to the server.
-
-    Returns None if the connection to the osu! api fails.
-    """
-    osu_stream_str = osu_stream.value
-    if osu_stream in (OsuStream.STABLE, OsuStream.BETA):
-        osu_stream_str += "40"  # i wonder why this exists
-
-    response = await services.http_client.get(
-        OSU_API_V2_CHANGELOG_URL,
-        params={"stream": osu_stream_str},
-    )
-    if not response.is_success:
-        return None
-
-    allowed_client_versions: set[date] = set()
-    for build in response.json()["builds"]:
-        version = date(
-            int(build["version"][0:4]),
-            int(build["version"][4:6]),
-            int(build["version"][6:8]),
-        )
-        allowed_client_versions.add(version)
-        if any(entry["major"] for entry in build["changelog_entries"]):
-            # this build is a major iteration to the client
-            # don't allow anything older than this
-            break
-
-    return allowed_client_versions
-
-
 def parse_adapters_string(adapters_string: str) -> tuple[list[str], bool]:
     running_under_wine = adapters_string == "runningunderwine"
     adapters = adapters_string[:-1].split(".")
@@ -618,14 +585,23 @@ async def authenticate(
     trusted_hashword = user_info["pw_bcrypt"].encode()
 
     # in-memory bcrypt lookup cache for performance
-    if trusted_hashword in app.state.cache.bcrypt:  # ~0.01 ms
-        if untrusted_password != app.state.cache.bcrypt[trusted_hashword]:
+    cached_password = app.state.cache.bcrypt.get(trusted_hashword)  # ~0.01 ms
+
+    if app.state.services.datadog:
+        outcome = "hits" if cached_password is not None else "misses"
+        app.state.services.datadog.increment(f"bancho.bcrypt_cache.{outcome}")
+
+    if cached_password is not None:
+        if untrusted_password != cached_password:
             return None
-    else:  # ~200ms
-        if not bcrypt.checkpw(untrusted_password, trusted_hashword):
+    else:  # ~200ms, in a thread pool
+        if not await passwords_usecases.verify_password(
+            untrusted_password,
+            trusted_hashword,
+        ):
             return None
 
-        app.state.cache.bcrypt[trusted_hashword] = untrusted_password
+        app.state.cache.bcrypt.set(trusted_hashword, untrusted_password)
 
     return user_info
 
@@ -671,8 +647,10 @@ async def handle_osu_login_request(
         }
 
     if app.settings.DISALLOW_OLD_CLIENTS:
-        allowed_client_versions = await get_allowed_client_versions(
-            osu_version.stream,
+        allowed_client_versions = (
+            await client_versions_usecases.get_allowed_client_versions(
+                osu_version.stream,
+            )
         )
         # in the case where the osu! api fails, we'll allow the client to connect
         if (
@@ -743,19 +721,15 @@ async def handle_osu_login_request(
 
     """ login credentials verified """
 
-    await logins_repo.create(
-        user_id=user_info["id"],
-        ip=str(ip),
-        osu_ver=osu_version.date,
-        osu_stream=osu_version.stream,
-    )
-
-    await client_hashes_repo.create(
-        userid=user_info["id"],
-        osupath=login_data["osu_path_md5"],
-        adapters=login_data["adapters_md5"],
-        uninstall_id=login_data["uninstall_md5"],
-        disk_serial=login_data["disk_signature_md5"],
+    # the login record is purely for auditing, so we don't
+    # make the player wait on it; write it in the background.
+    app.state.loop.create_task(
+        logins_repo.create(
+            user_id=user_info["id"],
+            ip=str(ip),
+            osu_ver=osu_version.date,
+            osu_stream=osu_version.stream,
+        ),
     )
 
     # TODO: store adapters individually
@@ -771,12 +745,25 @@ async def handle_osu_login_request(
     else:
         disk_signature_md5 = None
 
-    hw_matches = await client_hashes_repo.fetch_any_hardware_matches_for_user(
-        userid=user_info["id"],
-        running_under_wine=running_under_wine,
-        adapters=login_data["adapters_md5"],
-        uninstall_id=login_data["uninstall_md5"],
-        disk_serial=disk_signature_md5,
+    # the remaining checks are independent of one another, run them
+    # concurrently. (hardware matches exclude the user's own hashes,
+    # so they needn't wait for the client hashes to be stored)
+    _, hw_matches, geoloc = await asyncio.gather(
+        client_hashes_repo.create(
+            userid=user_info["id"],
+            osupath=login_data["osu_path_md5"],
+            adapters=login_data["adapters_md5"],
+            uninstall_id=login_data["uninstall_md5"],
+            disk_serial=login_data["disk_signature_md5"],
+        ),
+        client_hashes_repo.fetch_any_hardware_matches_for_user(
+            userid=user_info["id"],
+            running_under_wine=running_under_wine,
+            adapters=login_data["adapters_md5"],
+            uninstall_id=login_data["uninstall_md5"],
+            disk_serial=disk_signature_md5,
+        ),
+        app.state.services.fetch_geoloc(ip, headers),
     )
 
     if hw_matches:
@@ -806,19 +793,6 @@ async def handle_osu_login_request(
                     ),
                 }
 
-    """ All checks passed, player is safe to login """
-
-    # get clan & clan priv if we're in a clan
-    clan_id: int | None = None
-    clan_priv: ClanPrivileges | None = None
-    if user_info["clan_id"] != 0:
-        clan_id = user_info["clan_id"]
-        clan_priv = ClanPrivileges(user_info["clan_priv"])
-
-    db_country = user_info["country"]
-
-    geoloc = await app.state.services.fetch_geoloc(ip, headers)
-
     if geoloc is None:
         return {
             "osu_token": "login-failed",
@@ -830,15 +804,14 @@ async def handle_osu_login_request(
             ),
         }
 
-    if db_country == "xx":
-        # bugfix for old bancho.py versions when
-        # country wasn't stored on registration.
-        log(f"Fixing {login_data['username']}'s country.", Ansi.LGREEN)
+    """ All checks passed, player is safe to login """
 
-        await users_repo.partial_update(
-            id=user_info["id"],
-            country=geoloc["country"]["acronym"],
-        )
+    # get clan & clan priv if we're in a clan
+    clan_id: int | None = None
+    clan_priv: ClanPrivileges | None = None
+    if user_info["clan_id"] != 0:
+        clan_id = user_info["clan_id"]
+        clan_priv = ClanPrivileges(user_info["clan_priv"])
 
     client_details = ClientDetails(
         osu_version=osu_version,
@@ -912,10 +885,32 @@ async def handle_osu_login_request(
     # tells osu! to reorder channels based on config.
     data += app.packets.channel_info_end()
 
-    # fetch some of the player's
-    # information from sql to be cached.
-    await player.stats_from_sql_full()
-    await player.relationships_from_sql()
+    if user_info["country"] == "xx":
+        # bugfix for old bancho.py versions when
+        # country wasn't stored on registration.
+        log(f"Fixing {login_data['username']}'s country.", Ansi.LGREEN)
+
+        app.state.loop.create_task(
+            users_repo.partial_update(
+                id=user_info["id"],
+                country=geoloc["country"]["acronym"],
+            ),
+        )
+
+    # fetch some of the player's information from sql to be cached,
+    # along with any mail they may have been sent while offline.
+    mail_rows: list[mail_repo.MailWithUsernames] = []
+    if not player.restricted:
+        _, _, mail_rows = await asyncio.gather(
+            player.stats_from_sql_full(),
+            player.relationships_from_sql(),
+            mail_repo.fetch_all_mail_to_user(user_id=player.id, read=False),
+        )
+    else:
+        await asyncio.gather(
+            player.stats_from_sql_full(),
+            player.relationships_from_sql(),
+        )
 
     # TODO: fetch player.recent_scores from sql
 
@@ -927,34 +922,19 @@ async def handle_osu_login_request(
     data += app.packets.silence_end(player.remaining_silence)
 
     # update our new player's stats, and broadcast them.
-    user_data = app.packets.user_presence(player) + app.packets.user_stats(player)
+    user_data = player.presence_packet + player.stats_packet
 
     data += user_data
 
-    if not player.restricted:
-        # player is unrestricted, two way data
-        for o in app.state.sessions.players:
-            # enqueue us to them
-            o.enqueue(user_data)
+    # enqueue all unrestricted players to us.
+    data += app.state.sessions.players.snapshot.data
 
-            # enqueue them to us.
-            if not o.restricted:
-                if o is app.state.sessions.bot:
-                    # optimization for bot since it's
-                    # the most frequently requested user
-                    data += app.packets.bot_presence(o)
-                    data += app.packets.bot_stats(o)
-                else:
-                    data += app.packets.user_presence(o)
-                    data += app.packets.user_stats(o)
-
-        # the player may have been sent mail while offline,
-        # enqueue any messages from their respective authors.
-        mail_rows = await mail_repo.fetch_all_mail_to_user(
-            user_id=player.id,
-            read=False,
-        )
+    if not player.restricted:
+        # player is unrestricted, two way data;
+        # enqueue us to them.
+        app.state.sessions.players.enqueue(user_data)
 
+        # enqueue any unread mail from their respective authors.
         if mail_rows:
             sent_to: set[int] = set()
 
@@ -1005,17 +985,6 @@ async def handle_osu_login_request(
 
     else:
         # player is restricted, one way data
-        for o in app.state.sessions.players.unrestricted:
-            # enqueue them to us.
-            if o is app.state.sessions.bot:
-                # optimization for bot since it's
-                # the most frequently requested user
-                data += app.packets.bot_presence(o)
-                data += app.packets.bot_stats(o)
-            else:
-                data += app.packets.user_presence(o)
-                data += app.packets.user_stats(o)
-
         data += app.packets.account_restricted()
         data += app.packets.send_message(
             sender=app.state.sessions.bot.name,
@@ -1287,30 +1256,26 @@ class SendPrivateMessage(BasePacket):
                                 mods_str = r_match["mods"][1:]
                                 mods = Mods.from_np(mods_str, mode_vn)
 
-                            scores = [
-                                ScoreParams(
+                            try:
+                                results = await app.usecases.performance.get_cached_accuracy_performances(
+                                    osu_file_path=str(BEATMAPS_PATH / f"{bmap.id}.osu"),
+                                    beatmap_md5=bmap.md5,
                                     mode=mode_vn,
-                                    mods=int(mods) if mods else None,
-                                    acc=acc,
+                                    mods=int(mods) if mods else 0,
                                 )
-                                for acc in app.settings.PP_CACHED_ACCURACIES
-                            ]
-
-                            results = app.usecases.performance.calculate_performances(
-                                osu_file_path=str(BEATMAPS_PATH / f"{bmap.id}.osu"),
-                                scores=scores,
-                            )
-
-                            resp_msg = " | ".join(
-                                f"{acc}%: {result['performance']['pp']:,.2f}pp"
-                                for acc, result in zip(
-                                    app.settings.PP_CACHED_ACCURACIES,
-                                    results,
+                            except app.usecases.performance.PerformanceQueueFull:
+                                resp_msg = (
+                                    "The server is busy calculating pp; "
+                                    "please try again shortly."
+                                )
+                            else:
+                                resp_msg = " | ".join(
+                                    f"{acc}%: {result['performance']['pp']:,.2f}pp"
+                                    for acc, result in results.items()
                                 )
-                            )
 
-                            elapsed = time.time_ns() - pp_calc_st
-                            resp_msg += f" | Elapsed: {magnitude_fmt_time(elapsed)}"
+                                elapsed = time.time_ns() - pp_calc_st
+                                resp_msg += f" | Elapsed: {magnitude_fmt_time(elapsed)}"
                     else:
                         resp_msg = "Could not find map."
 
@@ -2113,18 +2078,20 @@ class StatsRequest(BasePacket):
         self.user_ids = reader.read_i32_list_i16l()
 
     async def handle(self, player: Player) -> None:
-        unrestrcted_ids = [p.id for p in app.state.sessions.players.unrestricted]
-        is_online = lambda o: o in unrestrcted_ids and o != player.id
+        unrestricted = app.state.sessions.players.unrestricted
+
+        for online in self.user_ids:
+            if online == player.id:
+                continue
 
-        for online in filter(is_online, self.user_ids):
             target = app.state.sessions.players.get(id=online)
-            if target:
+            if target and target in unrestricted:
                 if target is app.state.sessions.bot:
                     # optimization for bot since it's
                     # the most frequently requested user
                     packet = app.packets.bot_stats(target)
                 else:
-                    packet = app.packets.user_stats(target)
+                    packet = target.stats_packet
 
                 player.enqueue(packet)
 
@@ -2191,7 +2158,7 @@ class UserPresenceRequest(BasePacket):
                     # the most frequently requested user
                     packet = app.packets.bot_presence(target)
                 else:
-                    packet = app.packets.user_presence(target)
+                    packet = target.presence_packet
 
                 player.enqueue(packet)
 
@@ -2207,8 +2174,8 @@ class UserPresenceRequestAll(BasePacket):
 
         buffer = bytearray()
 
-        for player in app.state.sessions.players.unrestricted:
-            buffer += app.packets.user_presence(player)
+        for other in app.state.sessions.players.unrestricted:
+            buffer += other.presence_packet
 
         player.enqueue(bytes(buffer))
 
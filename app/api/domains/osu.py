@@ -19,7 +19,6 @@ from typing import Literal
 from urllib.parse import unquote
 from urllib.parse import unquote_plus
 
-import bcrypt
 from fastapi import status
 from fastapi.datastructures import FormData
 from fastapi.datastructures import UploadFile
@@ -59,7 +58,6 @@ from app.objects.player import Player
 from app.objects.score import Grade
 from app.objects.score import Score
 from app.objects.score import SubmissionStatus
-from app.repositories import clans as clans_repo
 from app.repositories import comments as comments_repo
 from app.repositories import favourites as favourites_repo
 from app.repositories import mail as mail_repo
@@ -69,7 +67,12 @@ from app.repositories import scores as scores_repo
 from app.repositories import stats as stats_repo
 from app.repositories import users as users_repo
 from app.repositories.achievements import Achievement
+from app.state.cache import RenderedLeaderboard
 from app.usecases import achievements as achievements_usecases
+from app.usecases import best_scores as best_scores_usecases
+from app.usecases import passwords as passwords_usecases
+from app.usecases import placements as placements_usecases
+from app.usecases import ratings as ratings_usecases
 from app.usecases import user_achievements as user_achievements_usecases
 from app.utils import escape_enum
 from app.utils import pymysql_encode
@@ -666,9 +669,10 @@ async def osuSubmitModularSelector(
     if score.mode != score.player.status.mode:
         score.player.status.mods = score.mods
         score.player.status.mode = score.mode
+        score.player.invalidate_packets()
 
         if not score.player.restricted:
-            app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+            app.state.sessions.players.enqueue(score.player.stats_packet)
 
     # hold a lock around (check if submitted, submission) to ensure no duplicates
     # are submitted to the database, and potentially award duplicate score/pp/etc.
@@ -690,7 +694,7 @@ async def osuSubmitModularSelector(
             expected_md5=bmap.md5,
         )
         if osu_file_available:
-            score.pp, score.sr = score.calculate_performance(bmap.id)
+            score.pp, score.sr = await score.calculate_performance(bmap.id)
 
             if score.passed:
                 await score.calculate_status()
@@ -816,6 +820,18 @@ async def osuSubmitModularSelector(
             },
         )
 
+        if score.status == SubmissionStatus.BEST:
+            # the map's leaderboards are now out of date
+            app.state.cache.leaderboards.invalidate_map(score.bmap.md5)
+
+            if not score.player.restricted:
+                placements_usecases.submit_best_score(
+                    score.bmap.md5,
+                    score.mode,
+                    score.player.id,
+                    score.pp if score.mode >= GameMode.RELAX_OSU else score.score,
+                )
+
     if score.passed:
         replay_data = await replay_file.read()
 
@@ -898,32 +914,17 @@ async def osuSubmitModularSelector(
             stats.rscore += additional_rscore
             stats_updates["rscore"] = stats.rscore
 
-            # fetch scores sorted by pp for total acc/pp calc
-            # NOTE: we select all plays (and not just top100)
-            # because bonus pp counts the total amount of ranked
-            # scores. I'm aware this scales horribly, and it'll
-            # likely be split into two queries in the future.
-            best_scores = await app.state.services.database.fetch_all(
-                "SELECT s.pp, s.acc FROM scores s "
-                "INNER JOIN maps m ON s.map_md5 = m.md5 "
-                "WHERE s.userid = :user_id AND s.mode = :mode "
-                "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
-                "ORDER BY s.pp DESC",
-                {"user_id": score.player.id, "mode": score.mode},
+            # update the player's index of best scores, and derive
+            # their new total acc/pp from it without refetching it.
+            stats.pp, stats.acc = await best_scores_usecases.submit_best_score(
+                score.player.id,
+                score.mode,
+                score.id,
+                score.pp,
+                score.acc,
+                prev_best_id=score.prev_best.id if score.prev_best else None,
             )
-
-            # calculate new total weighted accuracy
-            weighted_acc = sum(
-                row["acc"] * 0.95**i for i, row in enumerate(best_scores)
-            )
-            bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(best_scores)))
-            stats.acc = (weighted_acc * bonus_acc) / 100
             stats_updates["acc"] = stats.acc
-
-            # calculate new total weighted pp
-            weighted_pp = sum(row["pp"] * 0.95**i for i, row in enumerate(best_scores))
-            bonus_pp = 416.6667 * (1 - 0.9994 ** len(best_scores))
-            stats.pp = round(weighted_pp + bonus_pp)
             stats_updates["pp"] = stats.pp
 
             # update global & country ranking
@@ -947,9 +948,11 @@ async def osuSubmitModularSelector(
         pp=stats_updates.get("pp", UNSET),
     )
 
+    score.player.invalidate_packets()
+
     if not score.player.restricted:
         # enqueue new stats info to all other users
-        app.state.sessions.players.enqueue(app.packets.user_stats(score.player))
+        app.state.sessions.players.enqueue(score.player.stats_packet)
 
         # update beatmap with new stats
         score.bmap.plays += 1
@@ -1125,13 +1128,10 @@ async def osuRate(
             return Response(b"ok")
     else:
         # the client is submitting a rating for the map.
-        await ratings_repo.create(userid=player.id, map_md5=map_md5, rating=rating)
-
-    map_ratings = await ratings_repo.fetch_many(map_md5=map_md5)
-    ratings = [row["rating"] for row in map_ratings]
+        await ratings_usecases.create(userid=player.id, map_md5=map_md5, rating=rating)
 
     # send back the average rating
-    avg = sum(ratings) / len(ratings)
+    avg = await ratings_usecases.get_average_rating(map_md5)
     return Response(f"alreadyvoted\n{avg}".encode())
 
 
@@ -1145,23 +1145,43 @@ class LeaderboardType(IntEnum):
     Country = 4
 
 
-async def get_leaderboard_scores(
+SCORE_LISTING_FMTSTR = (
+    "{id}|{name}|{score}|{max_combo}|"
+    "{n50}|{n100}|{n300}|{nmiss}|{nkatu}|{ngeki}|"
+    "{perfect}|{mods}|{userid}|{rank}|{time}|{has_replay}"
+)
+
+
+def render_score_listing(score_rows: list[dict[str, Any]]) -> bytes:
+    """Render leaderboard rows as the listing lines of a getscores response."""
+    return "\n".join(
+        [
+            SCORE_LISTING_FMTSTR.format(
+                **s,
+                score=int(round(s["_score"])),
+                has_replay="1",
+                rank=idx + 1,
+            )
+            for idx, s in enumerate(score_rows)
+        ],
+    ).encode()
+
+
+async def fetch_leaderboard_score_rows(
     leaderboard_type: LeaderboardType | int,
     map_md5: str,
     mode: int,
     mods: Mods,
     player: Player,
     scoring_metric: Literal["pp", "score"],
-) -> tuple[list[dict[str, Any]], dict[str, Any] | None]:
+) -> list[dict[str, Any]]:
     query = [
         f"SELECT s.id, s.{scoring_metric} AS _score, "
         "s.max_combo, s.n50, s.n100, s.n300, "
         "s.nmiss, s.nkatu, s.ngeki, s.perfect, s.mods, "
-        "UNIX_TIMESTAMP(s.play_time) time, u.id userid, "
-        "COALESCE(CONCAT('[', c.tag, '] ', u.name), u.name) AS name "
+        "UNIX_TIMESTAMP(s.play_time) time, u.id userid, u.name, u.clan_id "
         "FROM scores s "
         "INNER JOIN users u ON u.id = s.userid "
-        "LEFT JOIN clans c ON c.id = u.clan_id "
         "WHERE s.map_md5 = :map_md5 AND s.status = 2 "  # 2: =best score
         "AND (u.priv & 1 OR u.id = :user_id) AND mode = :mode",
     ]
@@ -1190,7 +1210,64 @@ async def get_leaderboard_scores(
         params,
     )
 
-    if score_rows:  # None or []
+    # prefix names with clan tags
+    for row in score_rows:
+        row["name"] = app.state.sessions.clans.display_name(
+            row["name"],
+            row.pop("clan_id"),
+        )
+
+    return score_rows
+
+
+async def get_leaderboard_scores(
+    leaderboard_type: LeaderboardType | int,
+    map_md5: str,
+    mode: int,
+    mods: Mods,
+    player: Player,
+    scoring_metric: Literal["pp", "score"],
+) -> tuple[RenderedLeaderboard, dict[str, Any] | None]:
+    # the top scores are shared by all unrestricted players, except on
+    # friend leaderboards; restricted players also see their own scores.
+    cache_key: tuple[Any, ...] | None = None
+    if not player.restricted:
+        if leaderboard_type == LeaderboardType.Mods:
+            cache_key = (mode, LeaderboardType.Mods, mods)
+        elif leaderboard_type == LeaderboardType.Country:
+            country = player.geoloc["country"]["acronym"]
+            cache_key = (mode, LeaderboardType.Country, country)
+        elif leaderboard_type != LeaderboardType.Friends:
+            cache_key = (mode, LeaderboardType.Top)
+
+    leaderboard: RenderedLeaderboard | None = None
+    if cache_key is not None:
+        leaderboard = app.state.cache.leaderboards.get(map_md5, cache_key)
+
+    if leaderboard is None:
+        generation = app.state.cache.leaderboards.generation
+        score_rows = await fetch_leaderboard_score_rows(
+            leaderboard_type,
+            map_md5,
+            mode,
+            mods,
+            player,
+            scoring_metric,
+        )
+        leaderboard = RenderedLeaderboard(
+            score_rows,
+            render_score_listing(score_rows),
+        )
+
+        if cache_key is not None:
+            app.state.cache.leaderboards.set(
+                map_md5,
+                cache_key,
+                leaderboard,
+                generation,
+            )
+
+    if leaderboard.rows:
         # fetch player's personal best score
         personal_best_score_row = await app.state.services.database.fetch_one(
             f"SELECT id, {scoring_metric} AS _score, "
@@ -1206,34 +1283,18 @@ async def get_leaderboard_scores(
 
         if personal_best_score_row is not None:
             # calculate the rank of the score.
-            p_best_rank = 1 + await app.state.services.database.fetch_val(
-                "SELECT COUNT(*) FROM scores s "
-                "INNER JOIN users u ON u.id = s.userid "
-                "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
-                "AND s.status = 2 AND u.priv & 1 "
-                f"AND s.{scoring_metric} > :score",
-                {
-                    "map_md5": map_md5,
-                    "mode": mode,
-                    "score": personal_best_score_row["_score"],
-                },
-                column=0,  # COUNT(*)
+            p_best_rank = await placements_usecases.get_placement(
+                map_md5,
+                GameMode(mode),
+                personal_best_score_row["_score"],
             )
 
             # attach rank to personal best row
             personal_best_score_row["rank"] = p_best_rank
     else:
-        score_rows = []
         personal_best_score_row = None
 
-    return score_rows, personal_best_score_row
-
-
-SCORE_LISTING_FMTSTR = (
-    "{id}|{name}|{score}|{max_combo}|"
-    "{n50}|{n100}|{n300}|{nmiss}|{nkatu}|{ngeki}|"
-    "{perfect}|{mods}|{userid}|{rank}|{time}|{has_replay}"
-)
+    return leaderboard, personal_best_score_row
 
 
 @router.get("/web/osu-osz2-getscores.php")
@@ -1280,9 +1341,10 @@ async def getScores(
     if mode != player.status.mode:
         player.status.mods = mods
         player.status.mode = mode
+        player.invalidate_packets()
 
         if not player.restricted:
-            app.state.sessions.players.enqueue(app.packets.user_stats(player))
+            app.state.sessions.players.enqueue(player.stats_packet)
 
     scoring_metric: Literal["pp", "score"] = (
         "pp" if mode >= GameMode.RELAX_OSU else "score"
@@ -1343,9 +1405,8 @@ async def getScores(
         return Response(f"{int(bmap.status)}|false".encode())
 
     # fetch scores & personal best
-    # TODO: create a leaderboard cache
     if not requesting_from_editor_song_select:
-        score_rows, personal_best_score_row = await get_leaderboard_scores(
+        leaderboard, personal_best_score_row = await get_leaderboard_scores(
             leaderboard_type,
             bmap.md5,
             mode,
@@ -1354,48 +1415,35 @@ async def getScores(
             scoring_metric,
         )
     else:
-        score_rows = []
+        leaderboard = RenderedLeaderboard([], b"")
         personal_best_score_row = None
 
     # fetch beatmap rating
-    map_ratings = await ratings_repo.fetch_many(
-        map_md5=bmap.md5,
-        page=None,
-        page_size=None,
-    )
-    ratings = [row["rating"] for row in map_ratings]
-    map_avg_rating = sum(ratings) / len(ratings) if ratings else 0.0
+    map_avg_rating = await ratings_usecases.get_average_rating(bmap.md5)
 
     ## construct response for osu! client
 
     response_lines: list[str] = [
         # NOTE: fa stands for featured artist (for the ones that may not know)
         # {ranked_status}|{serv_has_osz2}|{bid}|{bsid}|{len(scores)}|{fa_track_id}|{fa_license_text}
-        f"{int(bmap.status)}|false|{bmap.id}|{bmap.set_id}|{len(score_rows)}|0|",
+        f"{int(bmap.status)}|false|{bmap.id}|{bmap.set_id}|{len(leaderboard.rows)}|0|",
         # {offset}\n{beatmap_name}\n{rating}
         # TODO: server side beatmap offsets
         f"0\n{bmap.full_name}\n{map_avg_rating}",
     ]
 
-    if not score_rows:
+    if not leaderboard.rows:
         response_lines.extend(("", ""))  # no scores, no personal best
         return Response("\n".join(response_lines).encode())
 
     if personal_best_score_row is not None:
-        user_clan = (
-            await clans_repo.fetch_one(id=player.clan_id)
-            if player.clan_id is not None
-            else None
-        )
-        display_name = (
-            f"[{user_clan['tag']}] {player.name}"
-            if user_clan is not None
-            else player.name
-        )
         response_lines.append(
             SCORE_LISTING_FMTSTR.format(
                 **personal_best_score_row,
-                name=display_name,
+                name=app.state.sessions.clans.display_name(
+                    player.name,
+                    player.clan_id,
+                ),
                 userid=player.id,
                 score=int(round(personal_best_score_row["_score"])),
                 has_replay="1",
@@ -1404,20 +1452,11 @@ async def getScores(
     else:
         response_lines.append("")
 
-    response_lines.extend(
-        [
-            SCORE_LISTING_FMTSTR.format(
-                **s,
-                score=int(round(s["_score"])),
-                has_replay="1",
-                rank=idx + 1,
-            )
-            for idx, s in enumerate(score_rows)
-        ],
+    # splice the personal best into the pre-rendered listing
+    return Response(
+        b"\n".join(("\n".join(response_lines).encode(), leaderboard.listing)),
     )
 
-    return Response("\n".join(response_lines).encode())
-
 
 @router.post("/web/osu-comment.php")
 async def osuComment(
@@ -1749,8 +1788,8 @@ async def register_account(
         # they want to register the account now.
         # make the md5 & bcrypt the md5 for sql.
         pw_md5 = hashlib.md5(pw_plaintext.encode()).hexdigest().encode()
-        pw_bcrypt = bcrypt.hashpw(pw_md5, bcrypt.gensalt())
-        app.state.cache.bcrypt[pw_bcrypt] = pw_md5  # cache result for login
+        pw_bcrypt = await passwords_usecases.hash_password(pw_md5)
+        app.state.cache.bcrypt.set(pw_bcrypt, pw_md5)  # cache result for login
 
         ip = app.state.services.ip_resolver.get_ip(request.headers)
 
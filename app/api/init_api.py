@@ -94,6 +94,12 @@ async def lifespan(asgi_app: BanchoAPI) -> AsyncIterator[None]:
 
     app.state.services.ip_resolver = app.state.services.IPResolver()
 
+    if app.state.services.geoloc_db is None:
+        log(
+            "No maxmind database loaded; geolocation will use ip-api.com.",
+            Ansi.LYELLOW,
+        )
+
     await app.state.services.run_sql_migrations()
 
     await collections.initialize_ram_caches()
@@ -117,6 +123,11 @@ async def lifespan(asgi_app: BanchoAPI) -> AsyncIterator[None]:
     await app.state.services.http_client.aclose()
     await app.state.services.database.disconnect()
     await app.state.services.redis.aclose()
+    app.state.services.bcrypt_executor.shutdown(cancel_futures=True)
+    app.state.services.performance_executor.shutdown(cancel_futures=True)
+
+    if app.state.services.geoloc_db is not None:
+        app.state.services.geoloc_db.close()
 
     if app.state.services.datadog is not None:
         app.state.services.datadog.stop()
@@ -5,6 +5,7 @@ from __future__ import annotations
 import hashlib
 import struct
 from pathlib import Path as SystemPath
+from typing import Any
 from typing import Literal
 
 from fastapi import APIRouter
@@ -69,6 +70,17 @@ oauth2_scheme = HTTPBearer(auto_error=False)
 DATETIME_OFFSET = 0x89F7FF5F7B58000
 
 
+def with_clan_info(row: dict[str, Any]) -> dict[str, Any]:
+    """Replace a row's `clan_id` with the clan's id, name & tag (or nulls)."""
+    clan_id = row.pop("clan_id")
+    clan = app.state.sessions.clans.get(clan_id) if clan_id else None
+
+    row["clan_id"] = clan["id"] if clan is not None else None
+    row["clan_name"] = clan["name"] if clan is not None else None
+    row["clan_tag"] = clan["tag"] if clan is not None else None
+    return row
+
+
 @router.get("/calculate_pp")
 async def api_calculate_pp(
     token: HTTPCredentials = Depends(oauth2_scheme),
@@ -129,10 +141,33 @@ async def api_calculate_pp(
             ),
         )
 
-    results = app.usecases.performance.calculate_performances(
-        str(BEATMAPS_PATH / f"{beatmap.id}.osu"),
-        scores,
-    )
+    try:
+        if (
+            all(x is None for x in [ngeki, nkatu, n100, n50, combo])
+            and not misses
+            and all(acc in app.settings.PP_CACHED_ACCURACIES for acc in acclist)
+        ):
+            # common full combo accuracies are served from the precomputed table
+            cached_results = (
+                await app.usecases.performance.get_cached_accuracy_performances(
+                    str(BEATMAPS_PATH / f"{beatmap.id}.osu"),
+                    beatmap.md5,
+                    GameMode(mode).as_vanilla,
+                    mods,
+                )
+            )
+            results = [cached_results[acc] for acc in acclist]
+        else:
+            results = await app.usecases.performance.calculate_performances_in_pool(
+                str(BEATMAPS_PATH / f"{beatmap.id}.osu"),
+                scores,
+                beatmap.md5,
+            )
+    except app.usecases.performance.PerformanceQueueFull:
+        return ORJSONResponse(
+            {"status": "Server is busy calculating pp; try again shortly."},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
 
     # "Inject" the accuracy into the list of results
     final_results = [
@@ -455,7 +490,7 @@ async def api_get_player_scores(
 
     clan: clans_repo.Clan | None = None
     if player.clan_id:
-        clan = await clans_repo.fetch_one(id=player.clan_id)
+        clan = app.state.sessions.clans.get(player.clan_id)
 
     player_info = {
         "id": player.id,
@@ -632,11 +667,9 @@ async def api_get_map_scores(
         "SELECT s.map_md5, s.score, s.pp, s.acc, s.max_combo, s.mods, "
         "s.n300, s.n100, s.n50, s.nmiss, s.ngeki, s.nkatu, s.grade, s.status, "
         "s.mode, s.play_time, s.time_elapsed, s.userid, s.perfect, "
-        "u.name player_name, u.country player_country, "
-        "c.id clan_id, c.name clan_name, c.tag clan_tag "
+        "u.name player_name, u.country player_country, u.clan_id "
         "FROM scores s "
         "INNER JOIN users u ON u.id = s.userid "
-        "LEFT JOIN clans c ON c.id = u.clan_id "
         "WHERE s.map_md5 = :map_md5 "
         "AND s.mode = :mode "
         "AND s.status = 2 "
@@ -670,7 +703,7 @@ async def api_get_map_scores(
     return ORJSONResponse(
         {
             "status": "success",
-            "scores": [dict(row) for row in rows],
+            "scores": [with_clan_info(row) for row in rows],
         },
     )
 
@@ -886,18 +919,16 @@ async def api_get_global_leaderboard(
     rows = await app.state.services.database.fetch_all(
         "SELECT u.id as player_id, u.name, u.country, s.tscore, s.rscore, "
         "s.pp, s.plays, s.playtime, s.acc, s.max_combo, "
-        "s.xh_count, s.x_count, s.sh_count, s.s_count, s.a_count, "
-        "c.id as clan_id, c.name as clan_name, c.tag as clan_tag "
+        "s.xh_count, s.x_count, s.sh_count, s.s_count, s.a_count, u.clan_id "
         "FROM stats s "
         "LEFT JOIN users u USING (id) "
-        "LEFT JOIN clans c ON u.clan_id = c.id "
         f"WHERE {' AND '.join(query_conditions)} "
         f"ORDER BY s.{sort} DESC LIMIT :offset, :limit",
         query_parameters | {"offset": offset, "limit": limit},
     )
 
     return ORJSONResponse(
-        {"status": "success", "leaderboard": [dict(row) for row in rows]},
+        {"status": "success", "leaderboard": [with_clan_info(row) for row in rows]},
     )
 
 
@@ -906,7 +937,7 @@ async def api_get_clan(
     clan_id: int = Query(..., alias="id", ge=1, le=2_147_483_647),
 ) -> Response:
     """Return information of a given clan."""
-    clan = await clans_repo.fetch_one(id=clan_id)
+    clan = app.state.sessions.clans.get(clan_id)
     if not clan:
         return ORJSONResponse(
             {"status": "Clan not found."},
@@ -970,7 +1001,7 @@ async def api_get_pool(
         )
 
     pool_creator_clan = (
-        await clans_repo.fetch_one(id=pool_creator.clan_id)
+        app.state.sessions.clans.get(pool_creator.clan_id)
         if pool_creator.clan_id is not None
         else None
     )
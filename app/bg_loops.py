@@ -9,6 +9,7 @@ import app.state
 from app.constants.privileges import Privileges
 from app.logging import Ansi
 from app.logging import log
+from app.usecases import client_versions as client_versions_usecases
 
 OSU_CLIENT_MIN_PING_INTERVAL = 300000 // 1000  # defined by osu!
 
@@ -30,6 +31,16 @@ async def initialize_housekeeping_tasks() -> None:
         },
     )
 
+    if app.settings.DISALLOW_OLD_CLIENTS:
+        app.state.sessions.housekeeping_tasks.add(
+            loop.create_task(_refresh_allowed_client_versions(interval=30 * 60)),
+        )
+
+    if app.state.services.datadog is not None:
+        app.state.sessions.housekeeping_tasks.add(
+            loop.create_task(_report_credential_cache_stats(interval=60)),
+        )
+
 
 async def _remove_expired_donation_privileges(interval: int) -> None:
     """Remove donation privileges from users with expired sessions."""
@@ -87,3 +98,27 @@ async def _update_bot_status(interval: int) -> None:
     while True:
         await asyncio.sleep(interval)
         app.packets.bot_stats.cache_clear()
+        app.state.sessions.players.snapshot.update(app.state.sessions.bot)
+
+
+async def _refresh_allowed_client_versions(interval: int) -> None:
+    """Refresh the allowed osu! client versions, every `interval`."""
+    while True:
+        await asyncio.sleep(interval)
+        await client_versions_usecases.refresh_all()
+
+
+async def _report_credential_cache_stats(interval: int) -> None:
+    """Report the bcrypt credential cache's stats to datadog, every `interval`."""
+    while True:
+        await asyncio.sleep(interval)
+
+        assert app.state.services.datadog is not None
+        cache = app.state.cache.bcrypt
+
+        app.state.services.datadog.gauge("bancho.bcrypt_cache.entries", len(cache))
+        app.state.services.datadog.gauge("bancho.bcrypt_cache.nbytes", cache.nbytes)
+        app.state.services.datadog.gauge(
+            "bancho.bcrypt_cache.hit_rate",
+            cache.hit_rate,
+        )
@@ -63,6 +63,8 @@ from app.repositories import maps as maps_repo
 from app.repositories import tourney_pool_maps as tourney_pool_maps_repo
 from app.repositories import tourney_pools as tourney_pools_repo
 from app.repositories import users as users_repo
+from app.usecases import best_scores as best_scores_usecases
+from app.usecases import placements as placements_usecases
 from app.usecases.performance import ScoreParams
 
 if TYPE_CHECKING:
@@ -279,6 +281,8 @@ async def changename(ctx: Context) -> str | None:
 
     # all checks passed, update their name
     await users_repo.partial_update(ctx.player.id, name=name)
+    app.state.sessions.players.change_username(ctx.player, name)
+    app.state.cache.leaderboards.invalidate_user(ctx.player.id)
 
     ctx.player.enqueue(
         app.packets.notification(f"Your username has been changed to {name}!"),
@@ -508,10 +512,25 @@ async def _with(ctx: Context) -> str | None:
         score_args.acc = acc
         msg_fields.append(f"{acc:.2f}%")
 
-    result = app.usecases.performance.calculate_performances(
-        osu_file_path=str(BEATMAPS_PATH / f"{bmap.id}.osu"),
-        scores=[score_args],  # calculate one score
-    )
+    try:
+        if combo is None and not nmiss and acc in app.settings.PP_CACHED_ACCURACIES:
+            cached_results = (
+                await app.usecases.performance.get_cached_accuracy_performances(
+                    osu_file_path=str(BEATMAPS_PATH / f"{bmap.id}.osu"),
+                    beatmap_md5=bmap.md5,
+                    mode=mode_vn,
+                    mods=int(mods) if mods else 0,
+                )
+            )
+            result = [cached_results[acc]]
+        else:
+            result = await app.usecases.performance.calculate_performances_in_pool(
+                osu_file_path=str(BEATMAPS_PATH / f"{bmap.id}.osu"),
+                scores=[score_args],  # calculate one score
+                beatmap_md5=bmap.md5,
+            )
+    except app.usecases.performance.PerformanceQueueFull:
+        return "The server is busy calculating pp; please try again shortly."
 
     return "{msg}: {pp:.2f}pp ({stars:.2f}*)".format(
         msg=" ".join(msg_fields),
@@ -679,6 +698,9 @@ async def _map(ctx: Context) -> str | None:
         # deactivate rank requests for all ids
         await map_requests_repo.mark_batch_as_inactive(map_ids=modified_beatmap_ids)
 
+    # scores on the map(s) may have started or stopped awarding pp
+    best_scores_usecases.invalidate()
+
     return f"{bmap.embed} updated to {new_status!s}."
 
 
@@ -863,14 +885,7 @@ async def user(ctx: Context) -> str | None:
         else "False"
     )
 
-    user_clan = (
-        await clans_repo.fetch_one(id=player.clan_id)
-        if player.clan_id is not None
-        else None
-    )
-    display_name = (
-        f"[{user_clan['tag']}] {player.name}" if user_clan is not None else player.name
-    )
+    display_name = app.state.sessions.clans.display_name(player.name, player.clan_id)
 
     return "\n".join(
         (
@@ -1172,6 +1187,9 @@ async def wipemap(ctx: Context) -> str | None:
         "DELETE FROM scores WHERE map_md5 = :map_md5",
         {"map_md5": map_md5},
     )
+    best_scores_usecases.invalidate()
+    app.state.cache.leaderboards.invalidate_map(map_md5)
+    placements_usecases.invalidate_map(map_md5)
 
     return "Scores wiped."
 
@@ -2300,15 +2318,15 @@ async def clan_create(ctx: Context) -> str | None:
         return "Clan name may be 2-16 characters long."
 
     if ctx.player.clan_id:
-        clan = await clans_repo.fetch_one(id=ctx.player.clan_id)
+        clan = app.state.sessions.clans.get(ctx.player.clan_id)
         if clan:
             clan_display_name = f"[{clan['tag']}] {clan['name']}"
             return f"You're already a member of {clan_display_name}!"
 
-    if await clans_repo.fetch_one(name=name):
+    if app.state.sessions.clans.get_by_name(name):
         return "That name has already been claimed by another clan."
 
-    if await clans_repo.fetch_one(tag=tag):
+    if app.state.sessions.clans.get_by_tag(tag):
         return "That tag has already been claimed by another clan."
 
     # add clan to sql
@@ -2317,6 +2335,7 @@ async def clan_create(ctx: Context) -> str | None:
         tag=tag,
         owner=ctx.player.id,
     )
+    app.state.sessions.clans.add(new_clan)
 
     # set owner's clan & clan priv (cache & sql)
     ctx.player.clan_id = new_clan["id"]
@@ -2327,6 +2346,7 @@ async def clan_create(ctx: Context) -> str | None:
         clan_id=new_clan["id"],
         clan_priv=ClanPrivileges.Owner,
     )
+    app.state.cache.leaderboards.invalidate_user(ctx.player.id)
 
     # announce clan creation
     announce_chan = app.state.sessions.channels.get_by_name("#announce")
@@ -2346,7 +2366,7 @@ async def clan_disband(ctx: Context) -> str | None:
         if ctx.player not in app.state.sessions.players.staff:
             return "Only staff members may disband the clans of others."
 
-        clan = await clans_repo.fetch_one(tag=" ".join(ctx.args).upper())
+        clan = app.state.sessions.clans.get_by_tag(" ".join(ctx.args).upper())
         if not clan:
             return "Could not find a clan by that tag."
     else:
@@ -2354,11 +2374,12 @@ async def clan_disband(ctx: Context) -> str | None:
             return "You're not a member of a clan!"
 
         # disband the player's clan
-        clan = await clans_repo.fetch_one(id=ctx.player.clan_id)
+        clan = app.state.sessions.clans.get(ctx.player.clan_id)
         if not clan:
             return "You're not a member of a clan!"
 
     await clans_repo.delete_one(clan["id"])
+    app.state.sessions.clans.remove(clan["id"])
 
     # remove all members from the clan
     clan_member_ids = [
@@ -2367,6 +2388,7 @@ async def clan_disband(ctx: Context) -> str | None:
     ]
     for member_id in clan_member_ids:
         await users_repo.partial_update(member_id, clan_id=0, clan_priv=0)
+        app.state.cache.leaderboards.invalidate_user(member_id)
 
         member = app.state.sessions.players.get(id=member_id)
         if member:
@@ -2389,7 +2411,7 @@ async def clan_info(ctx: Context) -> str | None:
     if not ctx.args:
         return "Invalid syntax: !clan info <tag>"
 
-    clan = await clans_repo.fetch_one(tag=" ".join(ctx.args).upper())
+    clan = app.state.sessions.clans.get_by_tag(" ".join(ctx.args).upper())
     if not clan:
         return "Could not find a clan by that tag."
 
@@ -2413,13 +2435,14 @@ async def clan_leave(ctx: Context) -> str | None:
     elif ctx.player.clan_priv == ClanPrivileges.Owner:
         return "You must transfer your clan's ownership before leaving it. Alternatively, you can use !clan disband."
 
-    clan = await clans_repo.fetch_one(id=ctx.player.clan_id)
+    clan = app.state.sessions.clans.get(ctx.player.clan_id)
     if not clan:
         return "You're not in a clan."
 
     clan_members = await users_repo.fetch_many(clan_id=clan["id"])
 
     await users_repo.partial_update(ctx.player.id, clan_id=0, clan_priv=0)
+    app.state.cache.leaderboards.invalidate_user(ctx.player.id)
     ctx.player.clan_id = None
     ctx.player.clan_priv = None
 
@@ -2428,6 +2451,7 @@ async def clan_leave(ctx: Context) -> str | None:
     if not clan_members:
         # no members left, disband clan
         await clans_repo.delete_one(clan["id"])
+        app.state.sessions.clans.remove(clan["id"])
 
         # announce clan disbanding
         announce_chan = app.state.sessions.channels.get_by_name("#announce")
@@ -2452,7 +2476,7 @@ async def clan_list(ctx: Context) -> str | None:
     else:
         offset = 0
 
-    all_clans = await clans_repo.fetch_many(page=None, page_size=None)
+    all_clans = list(app.state.sessions.clans.values())
     num_clans = len(all_clans)
     if offset >= num_clans:
         return "No clans found."
@@ -23,6 +23,8 @@ from app.constants.gamemodes import GameMode
 from app.logging import Ansi
 from app.logging import log
 from app.repositories import maps as maps_repo
+from app.usecases import best_scores as best_scores_usecases
+from app.usecases import placements as placements_usecases
 from app.utils import escape_enum
 from app.utils import pymysql_encode
 
@@ -699,6 +701,9 @@ class BeatmapSet:
                     ):
                         # update map from old_maps
                         bmap = old_maps[old_id]
+                        if old_map.status != new_ranked_status:
+                            best_scores_usecases.invalidate()
+
                         bmap._parse_from_osuapi_resp(new_map)
                         updated_maps.append(bmap)
                     else:
@@ -739,6 +744,10 @@ class BeatmapSet:
                     "DELETE FROM scores WHERE map_md5 IN :map_md5s",
                     {"map_md5s": map_md5s_to_delete},
                 )
+                best_scores_usecases.invalidate()
+                for map_md5 in map_md5s_to_delete:
+                    app.state.cache.leaderboards.invalidate_map(map_md5)
+                    placements_usecases.invalidate_map(map_md5)
 
             # update last_osuapi_check
             await app.state.services.database.execute(
@@ -775,6 +784,10 @@ class BeatmapSet:
                     "DELETE FROM scores WHERE map_md5 IN :map_md5s",
                     {"map_md5s": map_md5s_to_delete},
                 )
+                best_scores_usecases.invalidate()
+                for map_md5 in map_md5s_to_delete:
+                    app.state.cache.leaderboards.invalidate_map(map_md5)
+                    placements_usecases.invalidate_map(map_md5)
 
             # delete set
             await app.state.services.database.execute(
@@ -2,11 +2,14 @@ from __future__ import annotations
 
 from collections.abc import Iterable
 from collections.abc import Iterator
+from collections.abc import KeysView
 from collections.abc import Sequence
 from typing import Any
+from typing import cast
 
 import databases.core
 
+import app.packets
 import app.settings
 import app.state
 import app.utils
@@ -20,6 +23,7 @@ from app.objects.player import Player
 from app.repositories import channels as channels_repo
 from app.repositories import clans as clans_repo
 from app.repositories import users as users_repo
+from app.usecases import passwords as passwords_usecases
 from app.utils import make_safe_name
 
 
@@ -87,6 +91,56 @@ class Channels(list[Channel]):
             )
 
 
+class Clans(dict[int, clans_repo.Clan]):
+    """The clans registered on the server, by id."""
+
+    def __repr__(self) -> str:
+        return f'[{", ".join(clan["tag"] for clan in self.values())}]'
+
+    def get_by_tag(self, tag: str) -> clans_repo.Clan | None:
+        """Get a clan by `tag` (case-insensitive, as in sql)."""
+        tag = tag.lower()
+        for clan in self.values():
+            if clan["tag"].lower() == tag:
+                return clan
+
+        return None
+
+    def get_by_name(self, name: str) -> clans_repo.Clan | None:
+        """Get a clan by `name` (case-insensitive, as in sql)."""
+        name = name.lower()
+        for clan in self.values():
+            if clan["name"].lower() == name:
+                return clan
+
+        return None
+
+    def display_name(self, name: str, clan_id: int | None) -> str:
+        """Prefix a player's `name` with their clan's tag, if they have one."""
+        clan = self.get(clan_id) if clan_id else None
+        return f"[{clan['tag']}] {name}" if clan is not None else name
+
+    def add(self, clan: clans_repo.Clan) -> None:
+        """Add `clan` to the registry."""
+        self[clan["id"]] = clan
+
+        if app.settings.DEBUG:
+            log(f"{clan['name']} added to clans registry.")
+
+    def remove(self, clan_id: int) -> None:
+        """Remove the clan with `clan_id` from the registry."""
+        clan = self.pop(clan_id, None)
+
+        if app.settings.DEBUG and clan is not None:
+            log(f"{clan['name']} removed from clans registry.")
+
+    async def prepare(self) -> None:
+        """Fetch data from sql & return; preparing to run the server."""
+        log("Fetching clans from sql.", Ansi.LCYAN)
+        for row in await clans_repo.fetch_many():
+            self[row["id"]] = row
+
+
 class Matches(list[Match | None]):
     """The currently active multiplayer matches on the server."""
 
@@ -119,11 +173,92 @@ class Matches(list[Match | None]):
             log(f"{match} removed from matches list.")
 
 
+class WorldSnapshot:
+    """\
+    The presence & stats packets of all unrestricted online players,
+    concatenated; this is what a player is sent of the world on login.
+
+    Entries are maintained incrementally as players log in, log out & have
+    their state changed; only stale entries are re-encoded when read.
+    """
+
+    def __init__(self, players: Players) -> None:
+        self._players = players
+
+        # {player: presence + stats, ...}; None for stale entries
+        self._entries: dict[Player, bytes | None] = {}
+        self._data: bytes | None = b""
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _encode(player: Player) -> bytes:
+        if player.is_bot_client:
+            # optimization for bot since it's
+            # the most frequently requested user
+            return app.packets.bot_presence(player) + app.packets.bot_stats(player)
+        else:
+            return player.presence_packet + player.stats_packet
+
+    @property
+    def data(self) -> bytes:
+        """The concatenated packets of all players in the snapshot."""
+        if self._data is None:
+            for player, entry in self._entries.items():
+                if entry is None:
+                    self._entries[player] = self._encode(player)
+
+            self._data = b"".join(cast(Iterable[bytes], self._entries.values()))
+
+        return self._data
+
+    def add(self, player: Player) -> None:
+        """Add `player` to the snapshot."""
+        self._entries[player] = None
+        self._data = None
+
+    def remove(self, player: Player) -> None:
+        """Remove `player` from the snapshot (if present)."""
+        if player in self._entries:
+            del self._entries[player]
+            self._data = None
+
+    def update(self, player: Player) -> None:
+        """Mark `player`'s entry as stale, following their restriction status."""
+        if player.restricted:
+            self.remove(player)
+        elif player in self._players:
+            # (re-)add online players, e.g. on being unrestricted
+            self.add(player)
+
+
 class Players(list[Player]):
     """The currently active players on the server."""
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
+        self.snapshot = WorldSnapshot(self)
+
+        # indexes for constant time lookups. tourney clients share
+        # the id & name of the player's main session, so those keys
+        # map to all matching sessions, in the order they were added.
+        self._by_token: dict[str, Player] = {}
+        self._by_id: dict[int, list[Player]] = {}
+        self._by_safe_name: dict[str, list[Player]] = {}
+
+        # {player: (token, id, safe_name)}; the keys each player was indexed
+        # under, as their attributes may change before they're removed.
+        self._index_keys: dict[Player, tuple[str, int, str]] = {}
+
+        # privilege audiences, kept up to date as players are
+        # added, removed, or have their privileges changed.
+        self._staff: dict[Player, None] = {}
+        self._restricted: dict[Player, None] = {}
+        self._unrestricted: dict[Player, None] = {}
+
+        for player in self:
+            self._index(player)
 
     def __iter__(self) -> Iterator[Player]:
         return super().__iter__()
@@ -132,9 +267,10 @@ class Players(list[Player]):
         # allow us to either pass in the player
         # obj, or the player name as a string.
         if isinstance(player, str):
-            return player in (player.name for player in self)
+            matches = self._by_safe_name.get(make_safe_name(player), [])
+            return any(p.name == player for p in matches)
         else:
-            return super().__contains__(player)
+            return player in self._index_keys
 
     def __repr__(self) -> str:
         return f'[{", ".join(map(repr, self))}]'
@@ -142,22 +278,22 @@ class Players(list[Player]):
     @property
     def ids(self) -> set[int]:
         """Return a set of the current ids in the list."""
-        return {p.id for p in self}
+        return set(self._by_id)
 
     @property
-    def staff(self) -> set[Player]:
-        """Return a set of the current staff online."""
-        return {p for p in self if p.priv & Privileges.STAFF}
+    def staff(self) -> KeysView[Player]:
+        """Return a (live, read-only) set of the current staff online."""
+        return self._staff.keys()
 
     @property
-    def restricted(self) -> set[Player]:
-        """Return a set of the current restricted players."""
-        return {p for p in self if not p.priv & Privileges.UNRESTRICTED}
+    def restricted(self) -> KeysView[Player]:
+        """Return a (live, read-only) set of the current restricted players."""
+        return self._restricted.keys()
 
     @property
-    def unrestricted(self) -> set[Player]:
-        """Return a set of the current unrestricted players."""
-        return {p for p in self if p.priv & Privileges.UNRESTRICTED}
+    def unrestricted(self) -> KeysView[Player]:
+        """Return a (live, read-only) set of the current unrestricted players."""
+        return self._unrestricted.keys()
 
     def enqueue(self, data: bytes, immune: Sequence[Player] = []) -> None:
         """Enqueue `data` to all players, except for those in `immune`."""
@@ -172,18 +308,16 @@ class Players(list[Player]):
         name: str | None = None,
     ) -> Player | None:
         """Get a player by token, id, or name from cache."""
-        for player in self:
-            if token is not None:
-                if player.token == token:
-                    return player
-            elif id is not None:
-                if player.id == id:
-                    return player
-            elif name is not None:
-                if player.safe_name == make_safe_name(name):
-                    return player
+        if token is not None:
+            return self._by_token.get(token)
+        elif id is not None:
+            players = self._by_id.get(id)
+        elif name is not None:
+            players = self._by_safe_name.get(make_safe_name(name))
+        else:
+            return None
 
-        return None
+        return players[0] if players else None
 
     async def get_sql(
         self,
@@ -260,10 +394,67 @@ class Players(list[Player]):
 
         assert player.pw_bcrypt is not None
 
-        if app.state.cache.bcrypt[player.pw_bcrypt] == pw_md5.encode():
-            return player
+        cached_password = app.state.cache.bcrypt.get(player.pw_bcrypt)
+        if cached_password is not None:
+            return player if cached_password == pw_md5.encode() else None
 
-        return None
+        # not (or no longer) cached; fall back to bcrypt
+        if not await passwords_usecases.verify_password(
+            pw_md5.encode(),
+            player.pw_bcrypt,
+        ):
+            return None
+
+        app.state.cache.bcrypt.set(player.pw_bcrypt, pw_md5.encode())
+        return player
+
+    def _index(self, player: Player) -> None:
+        """Add `player` to the lookup indexes."""
+        keys = (player.token, player.id, player.safe_name)
+        self._index_keys[player] = keys
+
+        self._by_token[keys[0]] = player
+        self._by_id.setdefault(keys[1], []).append(player)
+        self._by_safe_name.setdefault(keys[2], []).append(player)
+
+    def _unindex(self, player: Player) -> None:
+        """Remove `player` from the lookup indexes."""
+        token, id, safe_name = self._index_keys.pop(player)
+
+        if self._by_token.get(token) is player:
+            del self._by_token[token]
+
+        id_sessions = self._by_id[id]
+        id_sessions.remove(player)
+        if not id_sessions:
+            del self._by_id[id]
+
+        name_sessions = self._by_safe_name[safe_name]
+        name_sessions.remove(player)
+        if not name_sessions:
+            del self._by_safe_name[safe_name]
+
+    def _add_to_audiences(self, player: Player) -> None:
+        """Add `player` to the privilege audiences they belong to."""
+        if player.priv & Privileges.STAFF:
+            self._staff[player] = None
+
+        if player.priv & Privileges.UNRESTRICTED:
+            self._unrestricted[player] = None
+        else:
+            self._restricted[player] = None
+
+    def _remove_from_audiences(self, player: Player) -> None:
+        """Remove `player` from all privilege audiences."""
+        self._staff.pop(player, None)
+        self._restricted.pop(player, None)
+        self._unrestricted.pop(player, None)
+
+    def update_privs(self, player: Player) -> None:
+        """Update `player`'s privilege audiences after a change in privileges."""
+        if player in self:
+            self._remove_from_audiences(player)
+            self._add_to_audiences(player)
 
     def append(self, player: Player) -> None:
         """Append `p` to the list."""
@@ -273,6 +464,11 @@ class Players(list[Player]):
             return
 
         super().append(player)
+        self._index(player)
+        self._add_to_audiences(player)
+
+        if not player.restricted:
+            self.snapshot.add(player)
 
     def remove(self, player: Player) -> None:
         """Remove `p` from the list."""
@@ -282,12 +478,28 @@ class Players(list[Player]):
             return
 
         super().remove(player)
+        self._unindex(player)
+        self._remove_from_audiences(player)
+        self.snapshot.remove(player)
+
+    def change_username(self, player: Player, new_name: str) -> None:
+        """Change `player`'s name, keeping the lookup indexes consistent."""
+        online = player in self
+        if online:
+            self._unindex(player)
+
+        player.name = new_name
+        player.invalidate_packets(stats=False)
+
+        if online:
+            self._index(player)
 
 
 async def initialize_ram_caches() -> None:
     """Setup & cache the global collections before listening for connections."""
     # fetch channels, clans and pools from db
     await app.state.sessions.channels.prepare()
+    await app.state.sessions.clans.prepare()
 
     bot = await users_repo.fetch_one(id=1)
     if bot is None:
@@ -39,6 +39,7 @@ from app.repositories import logs as logs_repo
 from app.repositories import stats as stats_repo
 from app.repositories import users as users_repo
 from app.state.services import Geolocation
+from app.usecases import placements as placements_usecases
 from app.utils import escape_enum
 from app.utils import make_safe_name
 from app.utils import pymysql_encode
@@ -343,6 +344,32 @@ class Player:
             ret |= ClientPrivileges.OWNER
         return ret
 
+    @cached_property
+    def stats_packet(self) -> bytes:
+        """The player's USER_STATS packet; cached until their state changes."""
+        return app.packets.user_stats(self)
+
+    @cached_property
+    def presence_packet(self) -> bytes:
+        """The player's USER_PRESENCE packet; cached until their state changes."""
+        return app.packets.user_presence(self)
+
+    def invalidate_packets(self, stats: bool = True, presence: bool = True) -> None:
+        """\
+        Wipe `self`'s cached stats and/or presence packets.
+
+        Must be called whenever the player's status, stats,
+        geolocation, privileges or rank are changed.
+        """
+        if stats and "stats_packet" in vars(self):
+            del self.stats_packet  # wipe cached_property
+
+        if presence and "presence_packet" in vars(self):
+            del self.presence_packet  # wipe cached_property
+
+        # keep the login snapshot of the world up to date
+        app.state.sessions.players.snapshot.update(self)
+
     @property
     def restricted(self) -> bool:
         """Return whether the player is restricted."""
@@ -411,6 +438,12 @@ class Player:
         self.priv = new
         if "bancho_priv" in vars(self):
             del self.bancho_priv  # wipe cached_property
+        self.invalidate_packets(stats=False)
+        app.state.sessions.players.update_privs(self)
+
+        # a verified password mustn't outlive a restriction or ban
+        if self.pw_bcrypt is not None:
+            app.state.cache.bcrypt.invalidate(self.pw_bcrypt)
 
         await users_repo.partial_update(
             id=self.id,
@@ -423,6 +456,8 @@ class Player:
         self.priv |= bits
         if "bancho_priv" in vars(self):
             del self.bancho_priv  # wipe cached_property
+        self.invalidate_packets(stats=False)
+        app.state.sessions.players.update_privs(self)
 
         await users_repo.partial_update(
             id=self.id,
@@ -440,6 +475,12 @@ class Player:
         self.priv &= ~bits
         if "bancho_priv" in vars(self):
             del self.bancho_priv  # wipe cached_property
+        self.invalidate_packets(stats=False)
+        app.state.sessions.players.update_privs(self)
+
+        # a verified password mustn't outlive a restriction or ban
+        if self.pw_bcrypt is not None:
+            app.state.cache.bcrypt.invalidate(self.pw_bcrypt)
 
         await users_repo.partial_update(
             id=self.id,
@@ -462,6 +503,10 @@ class Player:
             msg=reason,
         )
 
+        # their scores are no longer listed on leaderboards
+        app.state.cache.leaderboards.invalidate_user(self.id)
+        placements_usecases.remove_user(self.id)
+
         for mode in (0, 1, 2, 3, 4, 5, 6, 8):
             await app.state.services.redis.zrem(
                 f"bancho:leaderboard:{mode}",
@@ -496,6 +541,10 @@ class Player:
             msg=reason,
         )
 
+        # their scores may now be listed on any leaderboard
+        app.state.cache.leaderboards.clear()
+        placements_usecases.clear()
+
         if not self.is_online:
             await self.stats_from_sql_full()
 
@@ -950,7 +999,14 @@ class Player:
 
     async def stats_from_sql_full(self) -> None:
         """Retrieve `self`'s stats (all modes) from sql."""
-        for row in await stats_repo.fetch_many(player_id=self.id):
+        rows = await stats_repo.fetch_many(player_id=self.id)
+
+        # fetch the ranks for all modes at once
+        ranks = await asyncio.gather(
+            *[self.get_global_rank(GameMode(row["mode"])) for row in rows],
+        )
+
+        for row, rank in zip(rows, ranks):
             game_mode = GameMode(row["mode"])
             self.stats[game_mode] = ModeData(
                 tscore=row["tscore"],
@@ -961,7 +1017,7 @@ class Player:
                 playtime=row["playtime"],
                 max_combo=row["max_combo"],
                 total_hits=row["total_hits"],
-                rank=await self.get_global_rank(game_mode),
+                rank=rank,
                 grades={
                     Grade.XH: row["xh_count"],
                     Grade.X: row["x_count"],
@@ -971,6 +1027,8 @@ class Player:
                 },
             )
 
+        self.invalidate_packets()
+
     def update_latest_activity_soon(self) -> None:
         """Update the player's latest activity in the database."""
         task = users_repo.partial_update(
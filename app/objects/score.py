@@ -16,6 +16,7 @@ from app.constants.gamemodes import GameMode
 from app.constants.mods import Mods
 from app.objects.beatmap import Beatmap
 from app.repositories import scores as scores_repo
+from app.usecases import placements as placements_usecases
 from app.usecases.performance import ScoreParams
 from app.utils import escape_enum
 from app.utils import pymysql_encode
@@ -294,29 +295,17 @@ class Score:
         assert self.bmap is not None
 
         if self.mode >= GameMode.RELAX_OSU:
-            scoring_metric = "pp"
             score = self.pp
         else:
-            scoring_metric = "score"
             score = self.score
 
-        num_better_scores: int | None = await app.state.services.database.fetch_val(
-            "SELECT COUNT(*) AS c FROM scores s "
-            "INNER JOIN users u ON u.id = s.userid "
-            "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
-            "AND s.status = 2 AND u.priv & 1 "
-            f"AND s.{scoring_metric} > :score",
-            {
-                "map_md5": self.bmap.md5,
-                "mode": self.mode,
-                "score": score,
-            },
-            column=0,  # COUNT(*)
+        return await placements_usecases.get_placement(
+            self.bmap.md5,
+            self.mode,
+            score,
         )
-        assert num_better_scores is not None
-        return num_better_scores + 1
 
-    def calculate_performance(self, beatmap_id: int) -> tuple[float, float]:
+    async def calculate_performance(self, beatmap_id: int) -> tuple[float, float]:
         """Calculate PP and star rating for our score."""
         mode_vn = self.mode.as_vanilla
 
@@ -332,9 +321,11 @@ class Score:
             nmiss=self.nmiss,
         )
 
-        result = app.usecases.performance.calculate_performances(
+        result = await app.usecases.performance.calculate_performances_in_pool(
             osu_file_path=str(BEATMAPS_PATH / f"{beatmap_id}.osu"),
             scores=[score_args],
+            beatmap_md5=self.bmap.md5 if self.bmap is not None else None,
+            sheddable=False,  # submissions must be given pp
         )
 
         return result[0]["performance"]["pp"], result[0]["difficulty"]["stars"]
@@ -301,6 +301,34 @@ class BasePacket(ABC):
 PacketMap = dict[ClientPackets, type[BasePacket]]
 
 
+# precompiled structs for the reader; unpacking with an explicit
+# offset into the body avoids allocating a new view for every field.
+_HEADER_FMT = struct.Struct("<HxI")
+_I8_FMT = struct.Struct("<b")
+_I16_FMT = struct.Struct("<h")
+_U16_FMT = struct.Struct("<H")
+_I32_FMT = struct.Struct("<i")
+_U32_FMT = struct.Struct("<I")
+_I64_FMT = struct.Struct("<q")
+_U64_FMT = struct.Struct("<Q")
+_F16_FMT = struct.Struct("<e")
+_F32_FMT = struct.Struct("<f")
+_F64_FMT = struct.Struct("<d")
+
+_MATCH_HEADER_FMT = struct.Struct("<hbbi")
+_MATCH_SLOTS_FMT = struct.Struct("<16b16b")
+_MATCH_SLOT_MODS_FMT = struct.Struct("<16i")
+_MATCH_SETTINGS_FMT = struct.Struct("<ibbbb")
+_REPLAYFRAME_FMT = struct.Struct("<BBffi")
+_REPLAYFRAME_BUNDLE_HEADER_FMT = struct.Struct("<iH")
+
+
+@lru_cache(maxsize=64)
+def _i32_list_fmt(length: int) -> struct.Struct:
+    """Get a (cached) struct for an int32 list of `length` elements."""
+    return struct.Struct(f"<{length}I")
+
+
 class BanchoPacketReader:
     """\
     A class for reading bancho packets
@@ -311,6 +339,9 @@ class BanchoPacketReader:
     body_view: `memoryview`
         A readonly view of the request's body.
 
+    offset: `int`
+        The position of the reader's cursor within `body_view`.
+
     packet_map: `dict[ClientPackets, BasePacket]`
         The map of registered packets the reader may handle.
 
@@ -319,7 +350,7 @@ class BanchoPacketReader:
 
     Intended Usage:
     >>> with memoryview(await request.body()) as body_view:
-    ...     for packet in BanchoPacketReader(body_view):
+    ...     for packet in BanchoPacketReader(body_view, packet_map):
     ...         await packet.handle()
     """
 
@@ -327,6 +358,7 @@ class BanchoPacketReader:
         self.body_view = body_view  # readonly
         self.packet_map = packet_map
 
+        self.offset = 0  # cursor into body_view
         self.current_len = 0  # last read packet's length
 
     def __iter__(self) -> Iterator[BasePacket]:
@@ -335,14 +367,13 @@ class BanchoPacketReader:
     def __next__(self) -> BasePacket:
         # do not break until we've read the
         # header of a packet we can handle.
-        while self.body_view:  # len(self.view) < 7?
+        while self.offset < len(self.body_view):
             p_type, p_len = self._read_header()
 
             if p_type not in self.packet_map:
-                # packet type not handled, remove
-                # from internal buffer and continue.
-                if p_len != 0:
-                    self.body_view = self.body_view[p_len:]
+                # packet type not handled, skip
+                # over its data and continue.
+                self.offset += p_len
             else:
                 # we can handle this one.
                 break
@@ -358,110 +389,109 @@ class BanchoPacketReader:
     def _read_header(self) -> tuple[ClientPackets, int]:
         """Read the header of an osu! packet (id & length)."""
         # read type & length from the body
-        data = struct.unpack("<HxI", self.body_view[:7])
-        self.body_view = self.body_view[7:]
-        return ClientPackets(data[0]), data[1]
+        p_type, p_len = _HEADER_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 7
+        return ClientPackets(p_type), p_len
 
     """ public API (exposed for packet handler's __init__ methods) """
 
     def read_raw(self) -> memoryview:
-        val = self.body_view[: self.current_len]
-        self.body_view = self.body_view[self.current_len :]
-        return val
+        start = self.offset
+        self.offset += self.current_len
+        return self.body_view[start : self.offset]
 
     # integral types
 
     def read_i8(self) -> int:
-        val = self.body_view[0]
-        self.body_view = self.body_view[1:]
-        return val - 256 if val > 127 else val
+        (val,) = _I8_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 1
+        return cast(int, val)
 
     def read_u8(self) -> int:
-        val = self.body_view[0]
-        self.body_view = self.body_view[1:]
+        val = self.body_view[self.offset]
+        self.offset += 1
         return val
 
     def read_i16(self) -> int:
-        val = int.from_bytes(self.body_view[:2], "little", signed=True)
-        self.body_view = self.body_view[2:]
-        return val
+        (val,) = _I16_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 2
+        return cast(int, val)
 
     def read_u16(self) -> int:
-        val = int.from_bytes(self.body_view[:2], "little", signed=False)
-        self.body_view = self.body_view[2:]
-        return val
+        (val,) = _U16_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 2
+        return cast(int, val)
 
     def read_i32(self) -> int:
-        val = int.from_bytes(self.body_view[:4], "little", signed=True)
-        self.body_view = self.body_view[4:]
-        return val
+        (val,) = _I32_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 4
+        return cast(int, val)
 
     def read_u32(self) -> int:
-        val = int.from_bytes(self.body_view[:4], "little", signed=False)
-        self.body_view = self.body_view[4:]
-        return val
+        (val,) = _U32_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 4
+        return cast(int, val)
 
     def read_i64(self) -> int:
-        val = int.from_bytes(self.body_view[:8], "little", signed=True)
-        self.body_view = self.body_view[8:]
-        return val
+        (val,) = _I64_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 8
+        return cast(int, val)
 
     def read_u64(self) -> int:
-        val = int.from_bytes(self.body_view[:8], "little", signed=False)
-        self.body_view = self.body_view[8:]
-        return val
+        (val,) = _U64_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 8
+        return cast(int, val)
 
     # floating-point types
 
     def read_f16(self) -> float:
-        (val,) = struct.unpack_from("<e", self.body_view[:2])
-        self.body_view = self.body_view[2:]
+        (val,) = _F16_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 2
         return cast(float, val)
 
     def read_f32(self) -> float:
-        (val,) = struct.unpack_from("<f", self.body_view[:4])
-        self.body_view = self.body_view[4:]
+        (val,) = _F32_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 4
         return cast(float, val)
 
     def read_f64(self) -> float:
-        (val,) = struct.unpack_from("<d", self.body_view[:8])
-        self.body_view = self.body_view[8:]
+        (val,) = _F64_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += 8
         return cast(float, val)
 
     # complex types
 
+    def _read_i32_list(self, length: int) -> tuple[int, ...]:
+        val = _i32_list_fmt(length).unpack_from(self.body_view, self.offset)
+        self.offset += length * 4
+        return cast(tuple[int, ...], val)
+
     # XXX: some osu! packets use i16 for
     # array length, while others use i32
     def read_i32_list_i16l(self) -> tuple[int, ...]:
-        length = int.from_bytes(self.body_view[:2], "little")
-        self.body_view = self.body_view[2:]
-
-        val = struct.unpack(f'<{"I" * length}', self.body_view[: length * 4])
-        self.body_view = self.body_view[length * 4 :]
-        return val
+        return self._read_i32_list(self.read_u16())
 
     def read_i32_list_i32l(self) -> tuple[int, ...]:
-        length = int.from_bytes(self.body_view[:4], "little")
-        self.body_view = self.body_view[4:]
-
-        val = struct.unpack(f'<{"I" * length}', self.body_view[: length * 4])
-        self.body_view = self.body_view[length * 4 :]
-        return val
+        return self._read_i32_list(self.read_u32())
 
     def read_string(self) -> str:
-        exists = self.body_view[0] == 0x0B
-        self.body_view = self.body_view[1:]
+        body_view = self.body_view
+        offset = self.offset
+
+        exists = body_view[offset] == 0x0B
+        offset += 1
 
         if not exists:
             # no string sent.
+            self.offset = offset
             return ""
 
         # non-empty string, decode str length (uleb128)
         length = shift = 0
 
         while True:
-            byte = self.body_view[0]
-            self.body_view = self.body_view[1:]
+            byte = body_view[offset]
+            offset += 1
 
             length |= (byte & 0x7F) << shift
             if (byte & 0x80) == 0:
@@ -469,8 +499,9 @@ class BanchoPacketReader:
 
             shift += 7
 
-        val = self.body_view[:length].tobytes().decode()  # copy
-        self.body_view = self.body_view[length:]
+        # decode straight from the buffer, without an intermediate bytes copy
+        val = str(body_view[offset : offset + length], "utf-8")
+        self.offset = offset + length
         return val
 
     # custom osu! types
@@ -494,41 +525,56 @@ class BanchoPacketReader:
 
     def read_match(self) -> MultiplayerMatch:
         """Read an osu! match from the internal buffer."""
+        match_id, in_progress, powerplay, mods = _MATCH_HEADER_FMT.unpack_from(
+            self.body_view,
+            self.offset,
+        )
+        self.offset += _MATCH_HEADER_FMT.size
+
         match = MultiplayerMatch(
-            id=self.read_i16(),
-            in_progress=self.read_i8() == 1,
-            powerplay=self.read_i8(),
-            mods=self.read_i32(),
+            id=match_id,
+            in_progress=in_progress == 1,
+            powerplay=powerplay,
+            mods=mods,
             name=self.read_string(),
             passwd=self.read_string(),
             map_name=self.read_string(),
             map_id=self.read_i32(),
             map_md5=self.read_string(),
-            slot_statuses=[self.read_i8() for _ in range(16)],
-            slot_teams=[self.read_i8() for _ in range(16)],
-            # ^^ up to slot_ids, as it relies on slot_statuses ^^
         )
 
+        slots = _MATCH_SLOTS_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += _MATCH_SLOTS_FMT.size
+        match.slot_statuses = list(slots[:16])
+        match.slot_teams = list(slots[16:])
+
         for status in match.slot_statuses:
             if status & 124 != 0:  # slot has a player
                 match.slot_ids.append(self.read_i32())
 
-        match.host_id = self.read_i32()
-        match.mode = self.read_i8()
-        match.win_condition = self.read_i8()
-        match.team_type = self.read_i8()
-        match.freemods = self.read_i8() == 1
+        (
+            match.host_id,
+            match.mode,
+            match.win_condition,
+            match.team_type,
+            freemods,
+        ) = _MATCH_SETTINGS_FMT.unpack_from(self.body_view, self.offset)
+        self.offset += _MATCH_SETTINGS_FMT.size
+        match.freemods = freemods == 1
 
         if match.freemods:
-            match.slot_mods = [self.read_i32() for _ in range(16)]
+            match.slot_mods = list(
+                _MATCH_SLOT_MODS_FMT.unpack_from(self.body_view, self.offset),
+            )
+            self.offset += _MATCH_SLOT_MODS_FMT.size
 
         match.seed = self.read_i32()  # used for mania random mod
 
         return match
 
     def read_scoreframe(self) -> ScoreFrame:
-        sf = ScoreFrame(*SCOREFRAME_FMT.unpack_from(self.body_view[:29]))
-        self.body_view = self.body_view[29:]
+        sf = ScoreFrame(*SCOREFRAME_FMT.unpack_from(self.body_view, self.offset))
+        self.offset += SCOREFRAME_FMT.size
 
         if sf.score_v2:
             sf.combo_portion = self.read_f64()
@@ -537,20 +583,23 @@ class BanchoPacketReader:
         return sf
 
     def read_replayframe(self) -> ReplayFrame:
-        return ReplayFrame(
-            button_state=self.read_u8(),
-            taiko_byte=self.read_u8(),  # pre-taiko support (<=2008)
-            x=self.read_f32(),
-            y=self.read_f32(),
-            time=self.read_i32(),
+        frame = ReplayFrame._make(
+            _REPLAYFRAME_FMT.unpack_from(self.body_view, self.offset),
         )
+        self.offset += _REPLAYFRAME_FMT.size
+        return frame
 
     def read_replayframe_bundle(self) -> ReplayFrameBundle:
         # save raw format to distribute to the other clients
-        raw_data = self.body_view[: self.current_len]
+        raw_data = self.body_view[self.offset : self.offset + self.current_len]
+
+        # bancho proto >= 18
+        extra, framecount = _REPLAYFRAME_BUNDLE_HEADER_FMT.unpack_from(
+            self.body_view,
+            self.offset,
+        )
+        self.offset += _REPLAYFRAME_BUNDLE_HEADER_FMT.size
 
-        extra = self.read_i32()  # bancho proto >= 18
-        framecount = self.read_u16()
         frames = [self.read_replayframe() for _ in range(framecount)]
         action = ReplayAction(self.read_u8())
         scoreframe = self.read_scoreframe()
@@ -582,7 +631,11 @@ def write_string(s: str) -> bytes:
     """Write `s` into bytes (ULEB128 & string)."""
     if s:
         encoded = s.encode()
-        ret = b"\x0b" + write_uleb128(len(encoded)) + encoded
+        if len(encoded) < 0x80:
+            # the length fits in a single uleb128 byte
+            ret = bytes((0x0B, len(encoded))) + encoded
+        else:
+            ret = b"\x0b" + write_uleb128(len(encoded)) + encoded
     else:
         ret = b"\x00"
 
@@ -599,23 +652,6 @@ def write_i32_list(l: Collection[int]) -> bytearray:
     return ret
 
 
-def write_message(sender: str, msg: str, recipient: str, sender_id: int) -> bytearray:
-    """Write params into bytes (osu! message)."""
-    ret = bytearray(write_string(sender))
-    ret += write_string(msg)
-    ret += write_string(recipient)
-    ret += sender_id.to_bytes(4, "little", signed=True)
-    return ret
-
-
-def write_channel(name: str, topic: str, count: int) -> bytearray:
-    """Write params into bytes (osu! channel)."""
-    ret = bytearray(write_string(name))
-    ret += write_string(topic)
-    ret += count.to_bytes(2, "little")
-    return ret
-
-
 # XXX: deprecated
 # def write_mapInfoReply(maps: Sequence[BeatmapInfo]) -> bytearray:
 #    """ Write `maps` into bytes (osu! map info). """
@@ -632,10 +668,14 @@ def write_channel(name: str, topic: str, count: int) -> bytearray:
 #    return ret
 
 
+_WRITE_MATCH_HEADER_FMT = struct.Struct("<HbbI")
+_WRITE_MATCH_SETTINGS_FMT = struct.Struct("<IBBBB")
+
+
 def write_match(m: Match, send_pw: bool = True) -> bytearray:
     """Write `m` into bytes (osu! match)."""
     # 0 is for match type
-    ret = bytearray(struct.pack("<HbbI", m.id, m.in_progress, 0, m.mods))
+    ret = bytearray(_WRITE_MATCH_HEADER_FMT.pack(m.id, m.in_progress, 0, m.mods))
     ret += write_string(m.name)
 
     # osu expects \x0b\x00 if there's a password, but it's
@@ -649,25 +689,31 @@ def write_match(m: Match, send_pw: bool = True) -> bytearray:
         ret += b"\x00"
 
     ret += write_string(m.map_name)
-    ret += m.map_id.to_bytes(4, "little", signed=True)
+    ret += _I32_FMT.pack(m.map_id)
     ret += write_string(m.map_md5)
 
     ret.extend([s.status for s in m.slots])
     ret.extend([s.team for s in m.slots])
 
+    slot_ids = []
     for s in m.slots:
         if s.status & 0b01111100 != 0:  # SlotStatus.has_player
             assert s.player is not None
-            ret += s.player.id.to_bytes(4, "little")
-
-    ret += m.host.id.to_bytes(4, "little")
-    ret.extend((m.mode, m.win_condition, m.team_type, m.freemods))
+            slot_ids.append(s.player.id)
+
+    ret += _i32_list_fmt(len(slot_ids)).pack(*slot_ids)
+    ret += _WRITE_MATCH_SETTINGS_FMT.pack(
+        m.host.id,
+        m.mode,
+        m.win_condition,
+        m.team_type,
+        m.freemods,
+    )
 
     if m.freemods:
-        for s in m.slots:
-            ret += s.mods.to_bytes(4, "little")
+        ret += _i32_list_fmt(len(m.slots)).pack(*[s.mods for s in m.slots])
 
-    ret += m.seed.to_bytes(4, "little")
+    ret += _U32_FMT.pack(m.seed)
     return ret
 
 
@@ -695,49 +741,111 @@ def write_scoreframe(s: ScoreFrame) -> bytes:
     )
 
 
-_noexpand_types: dict[osuTypes, Callable[..., bytes]] = {
-    # base
-    osuTypes.i8: struct.Struct("<b").pack,
-    osuTypes.u8: struct.Struct("<B").pack,
-    osuTypes.i16: struct.Struct("<h").pack,
-    osuTypes.u16: struct.Struct("<H").pack,
-    osuTypes.i32: struct.Struct("<i").pack,
-    osuTypes.u32: struct.Struct("<I").pack,
-    # osuTypes.f16: struct.Struct('<e').pack, # futureproofing
-    osuTypes.f32: struct.Struct("<f").pack,
-    osuTypes.i64: struct.Struct("<q").pack,
-    osuTypes.u64: struct.Struct("<Q").pack,
-    osuTypes.f64: struct.Struct("<d").pack,
-    # more complex
+# packet schemas; each server packet declares its layout once, and
+# a specialized encoder is compiled for it. the longest fixed-size
+# prefix of the layout is packed together with the header in a single
+# call, and the rest of the layout is grouped into fixed-size runs
+# & variable-size fields, concatenated once the length is known.
+
+_FIXED_SIZE_TYPES: dict[osuTypes, str] = {
+    osuTypes.i8: "b",
+    osuTypes.u8: "B",
+    osuTypes.i16: "h",
+    osuTypes.u16: "H",
+    osuTypes.i32: "i",
+    osuTypes.u32: "I",
+    osuTypes.f32: "f",
+    osuTypes.i64: "q",
+    osuTypes.u64: "Q",
+    osuTypes.f64: "d",
+}
+
+
+def write_raw(data: bytes) -> bytes:
+    """Write `data` into bytes (as-is)."""
+    return data
+
+
+_VARIABLE_SIZE_TYPES: dict[osuTypes, Callable[[Any], bytes]] = {
     osuTypes.string: write_string,
     osuTypes.i32_list: write_i32_list,
     osuTypes.scoreframe: write_scoreframe,
+    osuTypes.raw: write_raw,
     # not (yet?) implemented: write replayframe & bundle
+    # NOTE: matches have options affecting their layout, and
+    # should be written with `write_match` into a raw field.
 }
 
-_expand_types: dict[osuTypes, Callable[..., bytearray]] = {
-    # multiarg, tuple expansion
-    osuTypes.message: write_message,
-    osuTypes.channel: write_channel,
-    osuTypes.match: write_match,
-}
+PacketEncoder = Callable[..., bytes]
 
 
-def write(packid: int, *args: tuple[Any, osuTypes]) -> bytes:
-    """Write `args` into bytes."""
-    ret = bytearray(struct.pack("<Hx", packid))
+def _fixed_size_segment(
+    fmt: struct.Struct,
+    start: int,
+    stop: int,
+) -> Callable[[tuple[Any, ...]], bytes]:
+    pack = fmt.pack
+    return lambda args: pack(*args[start:stop])
 
-    for p_args, p_type in args:
-        if p_type == osuTypes.raw:
-            ret += p_args
-        elif p_type in _noexpand_types:
-            ret += _noexpand_types[p_type](p_args)
-        elif p_type in _expand_types:
-            ret += _expand_types[p_type](*p_args)
 
-    # add size
-    ret[3:3] = struct.pack("<I", len(ret) - 3)
-    return bytes(ret)
+def _variable_size_segment(
+    writer: Callable[[Any], bytes],
+    index: int,
+) -> Callable[[tuple[Any, ...]], bytes]:
+    return lambda args: writer(args[index])
+
+
+def compile_packet(packid: ServerPackets, *layout: osuTypes) -> PacketEncoder:
+    """\
+    Compile an encoder for a server packet with the given `layout`.
+
+    The returned callable takes one positional argument per field
+    of the layout, and returns the serialized packet (header included).
+    """
+    # pack the longest fixed-size prefix along with the header
+    i = 0
+    head_fmt = "<HxI"
+    while i < len(layout) and layout[i] in _FIXED_SIZE_TYPES:
+        head_fmt += _FIXED_SIZE_TYPES[layout[i]]
+        i += 1
+
+    head = struct.Struct(head_fmt)
+    head_len = i
+    head_body_len = head.size - 7
+
+    if head_len == len(layout):
+        # the packet is entirely fixed-size;
+        # the length is known ahead of time.
+        def encode_fixed_size(*args: Any) -> bytes:
+            return head.pack(packid, head_body_len, *args)
+
+        return encode_fixed_size
+
+    segments: list[Callable[[tuple[Any, ...]], bytes]] = []
+    while i < len(layout):
+        if layout[i] in _FIXED_SIZE_TYPES:
+            start = i
+            fmt = "<"
+            while i < len(layout) and layout[i] in _FIXED_SIZE_TYPES:
+                fmt += _FIXED_SIZE_TYPES[layout[i]]
+                i += 1
+
+            segments.append(_fixed_size_segment(struct.Struct(fmt), start, i))
+        else:
+            segments.append(_variable_size_segment(_VARIABLE_SIZE_TYPES[layout[i]], i))
+            i += 1
+
+    def encode(*args: Any) -> bytes:
+        parts = [segment(args) for segment in segments]
+
+        body_len = head_body_len
+        for part in parts:
+            body_len += len(part)
+
+        header = head.pack(packid, body_len, *args[:head_len])
+        return b"".join((header, *parts))
+
+    return encode
 
 
 #
@@ -757,6 +865,9 @@ class LoginFailureReason(IntEnum):
 
 
 # packet id: 5
+_encode_login_reply = compile_packet(ServerPackets.USER_ID, osuTypes.i32)
+
+
 @cache
 def login_reply(user_id: int) -> bytes:
     """\
@@ -766,30 +877,39 @@ def login_reply(user_id: int) -> bytes:
 
     In failure cases, we'll send a negative integer of type `LoginFailureReason`.
     """
-    return write(ServerPackets.USER_ID, (user_id, osuTypes.i32))
+    return _encode_login_reply(user_id)
 
 
 # packet id: 7
+_encode_send_message = compile_packet(
+    ServerPackets.SEND_MESSAGE,
+    osuTypes.string,  # sender
+    osuTypes.string,  # msg
+    osuTypes.string,  # recipient
+    osuTypes.i32,  # sender_id
+)
+
+
 def send_message(sender: str, msg: str, recipient: str, sender_id: int) -> bytes:
-    return write(
-        ServerPackets.SEND_MESSAGE,
-        ((sender, msg, recipient, sender_id), osuTypes.message),
-    )
+    return _encode_send_message(sender, msg, recipient, sender_id)
 
 
 # packet id: 8
 @cache
 def pong() -> bytes:
-    return write(ServerPackets.PONG)
+    return compile_packet(ServerPackets.PONG)()
 
 
 # packet id: 9
 # NOTE: deprecated
+_encode_change_username = compile_packet(
+    ServerPackets.HANDLE_IRC_CHANGE_USERNAME,
+    osuTypes.string,
+)
+
+
 def change_username(old: str, new: str) -> bytes:
-    return write(
-        ServerPackets.HANDLE_IRC_CHANGE_USERNAME,
-        (f"{old}>>>>{new}", osuTypes.string),
-    )
+    return _encode_change_username(f"{old}>>>>{new}")
 
 
 BOT_STATUSES = (
@@ -801,6 +921,24 @@ BOT_STATUSES = (
     (9, "a pull request.."),  # submitting
 )
 
+# packet id: 11
+_encode_user_stats = compile_packet(
+    ServerPackets.USER_STATS,
+    osuTypes.i32,  # id
+    osuTypes.u8,  # action
+    osuTypes.string,  # info_text
+    osuTypes.string,  # map_md5
+    osuTypes.i32,  # mods
+    osuTypes.u8,  # mode
+    osuTypes.i32,  # map_id
+    osuTypes.i64,  # rscore
+    osuTypes.f32,  # acc
+    osuTypes.i32,  # plays
+    osuTypes.i64,  # tscore
+    osuTypes.i32,  # rank
+    osuTypes.u16,  # pp
+)
+
 # since the bot is always online and is
 # also automatically added to all player's
 # friends list, their stats are requested
@@ -814,25 +952,23 @@ def bot_stats(player: Player) -> bytes:
     # pick at random from list of potential statuses.
     status_id, status_txt = random.choice(BOT_STATUSES)
 
-    return write(
-        ServerPackets.USER_STATS,
-        (player.id, osuTypes.i32),  # id
-        (status_id, osuTypes.u8),  # action
-        (status_txt, osuTypes.string),  # info_text
-        ("", osuTypes.string),  # map_md5
-        (0, osuTypes.i32),  # mods
-        (0, osuTypes.u8),  # mode
-        (0, osuTypes.i32),  # map_id
-        (0, osuTypes.i64),  # rscore
-        (0.0, osuTypes.f32),  # acc
-        (0, osuTypes.i32),  # plays
-        (0, osuTypes.i64),  # tscore
-        (0, osuTypes.i32),  # rank
-        (0, osuTypes.u16),  # pp
+    return _encode_user_stats(
+        player.id,
+        status_id,
+        status_txt,
+        "",  # map_md5
+        0,  # mods
+        0,  # mode
+        0,  # map_id
+        0,  # rscore
+        0.0,  # acc
+        0,  # plays
+        0,  # tscore
+        0,  # rank
+        0,  # pp
     )
 
 
-# packet id: 11
 def _user_stats(
     user_id: int,
     action: int,
@@ -854,21 +990,20 @@ def _user_stats(
         ranked_score = pp
         pp = 0
 
-    return write(
-        ServerPackets.USER_STATS,
-        (user_id, osuTypes.i32),
-        (action, osuTypes.u8),
-        (info_text, osuTypes.string),
-        (map_md5, osuTypes.string),
-        (mods, osuTypes.i32),
-        (mode, osuTypes.u8),
-        (map_id, osuTypes.i32),
-        (ranked_score, osuTypes.i64),
-        (accuracy / 100.0, osuTypes.f32),
-        (plays, osuTypes.i32),
-        (total_score, osuTypes.i64),
-        (global_rank, osuTypes.i32),
-        (pp, osuTypes.u16),
+    return _encode_user_stats(
+        user_id,
+        action,
+        info_text,
+        map_md5,
+        mods,
+        mode,
+        map_id,
+        ranked_score,
+        accuracy / 100.0,
+        plays,
+        total_score,
+        global_rank,
+        pp,
     )
 
 
@@ -883,124 +1018,177 @@ def user_stats(player: Player) -> bytes:
         rscore = gm_stats.rscore
         pp = gm_stats.pp
 
-    return write(
-        ServerPackets.USER_STATS,
-        (player.id, osuTypes.i32),
-        (player.status.action, osuTypes.u8),
-        (player.status.info_text, osuTypes.string),
-        (player.status.map_md5, osuTypes.string),
-        (player.status.mods, osuTypes.i32),
-        (player.status.mode.as_vanilla, osuTypes.u8),
-        (player.status.map_id, osuTypes.i32),
-        (rscore, osuTypes.i64),
-        (gm_stats.acc / 100.0, osuTypes.f32),
-        (gm_stats.plays, osuTypes.i32),
-        (gm_stats.tscore, osuTypes.i64),
-        (gm_stats.rank, osuTypes.i32),
-        (pp, osuTypes.u16),
+    return _encode_user_stats(
+        player.id,
+        player.status.action,
+        player.status.info_text,
+        player.status.map_md5,
+        player.status.mods,
+        player.status.mode.as_vanilla,
+        player.status.map_id,
+        rscore,
+        gm_stats.acc / 100.0,
+        gm_stats.plays,
+        gm_stats.tscore,
+        gm_stats.rank,
+        pp,
     )
 
 
 # packet id: 12
+_encode_logout = compile_packet(ServerPackets.USER_LOGOUT, osuTypes.i32, osuTypes.u8)
+
+
 @cache
 def logout(user_id: int) -> bytes:
-    return write(ServerPackets.USER_LOGOUT, (user_id, osuTypes.i32), (0, osuTypes.u8))
+    return _encode_logout(user_id, 0)
 
 
 # packet id: 13
+_encode_spectator_joined = compile_packet(
+    ServerPackets.SPECTATOR_JOINED,
+    osuTypes.i32,
+)
+
+
 @cache
 def spectator_joined(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_JOINED, (user_id, osuTypes.i32))
+    return _encode_spectator_joined(user_id)
 
 
 # packet id: 14
+_encode_spectator_left = compile_packet(ServerPackets.SPECTATOR_LEFT, osuTypes.i32)
+
+
 @cache
 def spectator_left(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_LEFT, (user_id, osuTypes.i32))
+    return _encode_spectator_left(user_id)
 
 
 # packet id: 15
+_encode_spectate_frames = compile_packet(ServerPackets.SPECTATE_FRAMES, osuTypes.raw)
+
+
 def spectate_frames(data: bytes) -> bytes:
     # NOTE: this is left as unvalidated (raw) for efficiency due to the
     # sheer rate of usage of these packets in spectator mode.
 
     # spectator frames *received* by the server are always validated.
 
-    return write(ServerPackets.SPECTATE_FRAMES, (data, osuTypes.raw))
+    return _encode_spectate_frames(data)
 
 
 # packet id: 19
 @cache
 def version_update() -> bytes:
-    return write(ServerPackets.VERSION_UPDATE)
+    return compile_packet(ServerPackets.VERSION_UPDATE)()
 
 
 # packet id: 22
+_encode_spectator_cant_spectate = compile_packet(
+    ServerPackets.SPECTATOR_CANT_SPECTATE,
+    osuTypes.i32,
+)
+
+
 @cache
 def spectator_cant_spectate(user_id: int) -> bytes:
-    return write(ServerPackets.SPECTATOR_CANT_SPECTATE, (user_id, osuTypes.i32))
+    return _encode_spectator_cant_spectate(user_id)
 
 
 # packet id: 23
 @cache
 def get_attention() -> bytes:
-    return write(ServerPackets.GET_ATTENTION)
+    return compile_packet(ServerPackets.GET_ATTENTION)()
 
 
 # packet id: 24
+_encode_notification = compile_packet(ServerPackets.NOTIFICATION, osuTypes.string)
+
+
 @lru_cache(maxsize=4)
 def notification(msg: str) -> bytes:
-    return write(ServerPackets.NOTIFICATION, (msg, osuTypes.string))
+    return _encode_notification(msg)
 
 
 # packet id: 26
+_encode_update_match = compile_packet(ServerPackets.UPDATE_MATCH, osuTypes.raw)
+
+
 def update_match(m: Match, send_pw: bool = True) -> bytes:
-    return write(ServerPackets.UPDATE_MATCH, ((m, send_pw), osuTypes.match))
+    return _encode_update_match(write_match(m, send_pw))
 
 
 # packet id: 27
+_encode_new_match = compile_packet(ServerPackets.NEW_MATCH, osuTypes.raw)
+
+
 def new_match(m: Match) -> bytes:
-    return write(ServerPackets.NEW_MATCH, ((m, True), osuTypes.match))
+    return _encode_new_match(write_match(m, send_pw=True))
 
 
 # packet id: 28
+_encode_dispose_match = compile_packet(ServerPackets.DISPOSE_MATCH, osuTypes.i32)
+
+
 @cache
 def dispose_match(id: int) -> bytes:
-    return write(ServerPackets.DISPOSE_MATCH, (id, osuTypes.i32))
+    return _encode_dispose_match(id)
 
 
 # packet id: 34
 @cache
 def toggle_block_non_friend_dm() -> bytes:
-    return write(ServerPackets.TOGGLE_BLOCK_NON_FRIEND_DMS)
+    return compile_packet(ServerPackets.TOGGLE_BLOCK_NON_FRIEND_DMS)()
 
 
 # packet id: 36
+_encode_match_join_success = compile_packet(
+    ServerPackets.MATCH_JOIN_SUCCESS,
+    osuTypes.raw,
+)
+
+
 def match_join_success(m: Match) -> bytes:
-    return write(ServerPackets.MATCH_JOIN_SUCCESS, ((m, True), osuTypes.match))
+    return _encode_match_join_success(write_match(m, send_pw=True))
 
 
 # packet id: 37
 @cache
 def match_join_fail() -> bytes:
-    return write(ServerPackets.MATCH_JOIN_FAIL)
+    return compile_packet(ServerPackets.MATCH_JOIN_FAIL)()
 
 
 # packet id: 42
+_encode_fellow_spectator_joined = compile_packet(
+    ServerPackets.FELLOW_SPECTATOR_JOINED,
+    osuTypes.i32,
+)
+
+
 @cache
 def fellow_spectator_joined(user_id: int) -> bytes:
-    return write(ServerPackets.FELLOW_SPECTATOR_JOINED, (user_id, osuTypes.i32))
+    return _encode_fellow_spectator_joined(user_id)
 
 
 # packet id: 43
+_encode_fellow_spectator_left = compile_packet(
+    ServerPackets.FELLOW_SPECTATOR_LEFT,
+    osuTypes.i32,
+)
+
+
 @cache
 def fellow_spectator_left(user_id: int) -> bytes:
-    return write(ServerPackets.FELLOW_SPECTATOR_LEFT, (user_id, osuTypes.i32))
+    return _encode_fellow_spectator_left(user_id)
 
 
 # packet id: 46
+_encode_match_start = compile_packet(ServerPackets.MATCH_START, osuTypes.raw)
+
+
 def match_start(m: Match) -> bytes:
-    return write(ServerPackets.MATCH_START, ((m, True), osuTypes.match))
+    return _encode_match_start(write_match(m, send_pw=True))
 
 
 # packet id: 48
@@ -1008,65 +1196,99 @@ def match_start(m: Match) -> bytes:
 #       much faster to just send the bytes back
 #       rather than parsing them. Though I might
 #       end up doing it eventually for security reasons
+_encode_match_score_update = compile_packet(
+    ServerPackets.MATCH_SCORE_UPDATE,
+    osuTypes.scoreframe,
+)
+
+
 def match_score_update(frame: ScoreFrame) -> bytes:
-    return write(ServerPackets.MATCH_SCORE_UPDATE, (frame, osuTypes.scoreframe))
+    return _encode_match_score_update(frame)
 
 
 # packet id: 50
 @cache
 def match_transfer_host() -> bytes:
-    return write(ServerPackets.MATCH_TRANSFER_HOST)
+    return compile_packet(ServerPackets.MATCH_TRANSFER_HOST)()
 
 
 # packet id: 53
 @cache
 def match_all_players_loaded() -> bytes:
-    return write(ServerPackets.MATCH_ALL_PLAYERS_LOADED)
+    return compile_packet(ServerPackets.MATCH_ALL_PLAYERS_LOADED)()
 
 
 # packet id: 57
+_encode_match_player_failed = compile_packet(
+    ServerPackets.MATCH_PLAYER_FAILED,
+    osuTypes.i32,
+)
+
+
 @cache
 def match_player_failed(slot_id: int) -> bytes:
-    return write(ServerPackets.MATCH_PLAYER_FAILED, (slot_id, osuTypes.i32))
+    return _encode_match_player_failed(slot_id)
 
 
 # packet id: 58
 @cache
 def match_complete() -> bytes:
-    return write(ServerPackets.MATCH_COMPLETE)
+    return compile_packet(ServerPackets.MATCH_COMPLETE)()
 
 
 # packet id: 61
 @cache
 def match_skip() -> bytes:
-    return write(ServerPackets.MATCH_SKIP)
+    return compile_packet(ServerPackets.MATCH_SKIP)()
 
 
 # packet id: 64
+_encode_channel_join = compile_packet(
+    ServerPackets.CHANNEL_JOIN_SUCCESS,
+    osuTypes.string,
+)
+
+
 @lru_cache(maxsize=16)
 def channel_join(name: str) -> bytes:
-    return write(ServerPackets.CHANNEL_JOIN_SUCCESS, (name, osuTypes.string))
+    return _encode_channel_join(name)
 
 
 # packet id: 65
+_encode_channel_info = compile_packet(
+    ServerPackets.CHANNEL_INFO,
+    osuTypes.string,  # name
+    osuTypes.string,  # topic
+    osuTypes.u16,  # player count
+)
+
+
 @lru_cache(maxsize=8)
 def channel_info(name: str, topic: str, p_count: int) -> bytes:
-    return write(ServerPackets.CHANNEL_INFO, ((name, topic, p_count), osuTypes.channel))
+    return _encode_channel_info(name, topic, p_count)
 
 
 # packet id: 66
+_encode_channel_kick = compile_packet(ServerPackets.CHANNEL_KICK, osuTypes.string)
+
+
 @lru_cache(maxsize=8)
 def channel_kick(name: str) -> bytes:
-    return write(ServerPackets.CHANNEL_KICK, (name, osuTypes.string))
+    return _encode_channel_kick(name)
 
 
 # packet id: 67
+_encode_channel_auto_join = compile_packet(
+    ServerPackets.CHANNEL_AUTO_JOIN,
+    osuTypes.string,  # name
+    osuTypes.string,  # topic
+    osuTypes.u16,  # player count
+)
+
+
 @lru_cache(maxsize=8)
 def channel_auto_join(name: str, topic: str, p_count: int) -> bytes:
-    return write(
-        ServerPackets.CHANNEL_AUTO_JOIN,
-        ((name, topic, p_count), osuTypes.channel),
-    )
+    return _encode_channel_auto_join(name, topic, p_count)
 
 
 # packet id: 69
@@ -1078,29 +1300,41 @@ def channel_auto_join(name: str, topic: str, p_count: int) -> bytes:
 
 
 # packet id: 71
+_encode_bancho_privileges = compile_packet(ServerPackets.PRIVILEGES, osuTypes.i32)
+
+
 @cache
 def bancho_privileges(priv: int) -> bytes:
-    return write(ServerPackets.PRIVILEGES, (priv, osuTypes.i32))
+    return _encode_bancho_privileges(priv)
 
 
 # packet id: 72
+_encode_friends_list = compile_packet(ServerPackets.FRIENDS_LIST, osuTypes.i32_list)
+
+
 def friends_list(friends: Collection[int]) -> bytes:
-    return write(ServerPackets.FRIENDS_LIST, (friends, osuTypes.i32_list))
+    return _encode_friends_list(friends)
 
 
 # packet id: 75
+_encode_protocol_version = compile_packet(
+    ServerPackets.PROTOCOL_VERSION,
+    osuTypes.i32,
+)
+
+
 @cache
 def protocol_version(ver: int) -> bytes:
-    return write(ServerPackets.PROTOCOL_VERSION, (ver, osuTypes.i32))
+    return _encode_protocol_version(ver)
 
 
 # packet id: 76
+_encode_main_menu_icon = compile_packet(ServerPackets.MAIN_MENU_ICON, osuTypes.string)
+
+
 @cache
 def main_menu_icon(icon_url: str, onclick_url: str) -> bytes:
-    return write(
-        ServerPackets.MAIN_MENU_ICON,
-        (icon_url + "|" + onclick_url, osuTypes.string),
-    )
+    return _encode_main_menu_icon(icon_url + "|" + onclick_url)
 
 
 # packet id: 80
@@ -1114,13 +1348,33 @@ def monitor() -> bytes:
 
     # this doesn't work on newer clients, and I had no plans
     # of trying to put it to use - just coded for completion.
-    return write(ServerPackets.MONITOR)
+    return compile_packet(ServerPackets.MONITOR)()
 
 
 # packet id: 81
+_encode_match_player_skipped = compile_packet(
+    ServerPackets.MATCH_PLAYER_SKIPPED,
+    osuTypes.i32,
+)
+
+
 @cache
 def match_player_skipped(user_id: int) -> bytes:
-    return write(ServerPackets.MATCH_PLAYER_SKIPPED, (user_id, osuTypes.i32))
+    return _encode_match_player_skipped(user_id)
+
+
+# packet id: 83
+_encode_user_presence = compile_packet(
+    ServerPackets.USER_PRESENCE,
+    osuTypes.i32,  # id
+    osuTypes.string,  # name
+    osuTypes.u8,  # utc offset (+24)
+    osuTypes.u8,  # country code
+    osuTypes.u8,  # bancho privileges | (mode << 5)
+    osuTypes.f32,  # longitude
+    osuTypes.f32,  # latitude
+    osuTypes.i32,  # global rank
+)
 
 
 # since the bot is always online and is
@@ -1129,20 +1383,18 @@ def match_player_skipped(user_id: int) -> bytes:
 # *very* frequently; only build it once.
 @cache
 def bot_presence(player: Player) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (player.id, osuTypes.i32),
-        (player.name, osuTypes.string),
-        (-5 + 24, osuTypes.u8),
-        (245, osuTypes.u8),  # satellite provider
-        (31, osuTypes.u8),
-        (1234.0, osuTypes.f32),  # send coordinates waaay
-        (4321.0, osuTypes.f32),  # off the map for the bot
-        (0, osuTypes.i32),
+    return _encode_user_presence(
+        player.id,
+        player.name,
+        -5 + 24,
+        245,  # satellite provider
+        31,
+        1234.0,  # send coordinates waaay
+        4321.0,  # off the map for the bot
+        0,
     )
 
 
-# packet id: 83
 def _user_presence(
     user_id: int,
     name: str,
@@ -1154,136 +1406,194 @@ def _user_presence(
     longitude: int,
     global_rank: int,
 ) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (user_id, osuTypes.i32),
-        (name, osuTypes.string),
-        (utc_offset + 24, osuTypes.u8),
-        (country_code, osuTypes.u8),
-        (bancho_privileges | (mode << 5), osuTypes.u8),
-        (longitude, osuTypes.f32),
-        (latitude, osuTypes.f32),
-        (global_rank, osuTypes.i32),
+    return _encode_user_presence(
+        user_id,
+        name,
+        utc_offset + 24,
+        country_code,
+        bancho_privileges | (mode << 5),
+        longitude,
+        latitude,
+        global_rank,
     )
 
 
 def user_presence(player: Player) -> bytes:
-    return write(
-        ServerPackets.USER_PRESENCE,
-        (player.id, osuTypes.i32),
-        (player.name, osuTypes.string),
-        (player.utc_offset + 24, osuTypes.u8),
-        (player.geoloc["country"]["numeric"], osuTypes.u8),
-        (player.bancho_priv | (player.status.mode.as_vanilla << 5), osuTypes.u8),
-        (player.geoloc["longitude"], osuTypes.f32),
-        (player.geoloc["latitude"], osuTypes.f32),
-        (player.gm_stats.rank, osuTypes.i32),
+    return _encode_user_presence(
+        player.id,
+        player.name,
+        player.utc_offset + 24,
+        player.geoloc["country"]["numeric"],
+        player.bancho_priv | (player.status.mode.as_vanilla << 5),
+        player.geoloc["longitude"],
+        player.geoloc["latitude"],
+        player.gm_stats.rank,
     )
 
 
 # packet id: 86
+_encode_restart_server = compile_packet(ServerPackets.RESTART, osuTypes.i32)
+
+
 @cache
 def restart_server(ms: int) -> bytes:
-    return write(ServerPackets.RESTART, (ms, osuTypes.i32))
+    return _encode_restart_server(ms)
 
 
 # packet id: 88
+_encode_match_invite = compile_packet(
+    ServerPackets.MATCH_INVITE,
+    osuTypes.string,  # sender
+    osuTypes.string,  # msg
+    osuTypes.string,  # recipient
+    osuTypes.i32,  # sender_id
+)
+
+
 def match_invite(player: Player, target_name: str) -> bytes:
     assert player.match is not None
     msg = f"Come join my game: {player.match.embed}."
-    return write(
-        ServerPackets.MATCH_INVITE,
-        ((player.name, msg, target_name, player.id), osuTypes.message),
-    )
+    return _encode_match_invite(player.name, msg, target_name, player.id)
 
 
 # packet id: 89
 @cache
 def channel_info_end() -> bytes:
-    return write(ServerPackets.CHANNEL_INFO_END)
+    return compile_packet(ServerPackets.CHANNEL_INFO_END)()
 
 
 # packet id: 91
+_encode_match_change_password = compile_packet(
+    ServerPackets.MATCH_CHANGE_PASSWORD,
+    osuTypes.string,
+)
+
+
 def match_change_password(new: str) -> bytes:
-    return write(ServerPackets.MATCH_CHANGE_PASSWORD, (new, osuTypes.string))
+    return _encode_match_change_password(new)
 
 
 # packet id: 92
+_encode_silence_end = compile_packet(ServerPackets.SILENCE_END, osuTypes.i32)
+
+
 def silence_end(delta: int) -> bytes:
-    return write(ServerPackets.SILENCE_END, (delta, osuTypes.i32))
+    return _encode_silence_end(delta)
 
 
 # packet id: 94
+_encode_user_silenced = compile_packet(ServerPackets.USER_SILENCED, osuTypes.i32)
+
+
 @cache
 def user_silenced(user_id: int) -> bytes:
-    return write(ServerPackets.USER_SILENCED, (user_id, osuTypes.i32))
+    return _encode_user_silenced(user_id)
 
 
 """ not sure why 95 & 96 exist? unused in bancho.py """
 
 
 # packet id: 95
+_encode_user_presence_single = compile_packet(
+    ServerPackets.USER_PRESENCE_SINGLE,
+    osuTypes.i32,
+)
+
+
 @cache
 def user_presence_single(user_id: int) -> bytes:
-    return write(ServerPackets.USER_PRESENCE_SINGLE, (user_id, osuTypes.i32))
+    return _encode_user_presence_single(user_id)
 
 
 # packet id: 96
+_encode_user_presence_bundle = compile_packet(
+    ServerPackets.USER_PRESENCE_BUNDLE,
+    osuTypes.i32_list,
+)
+
+
 def user_presence_bundle(user_ids: Collection[int]) -> bytes:
-    return write(ServerPackets.USER_PRESENCE_BUNDLE, (user_ids, osuTypes.i32_list))
+    return _encode_user_presence_bundle(user_ids)
 
 
 # packet id: 100
+_encode_user_dm_blocked = compile_packet(
+    ServerPackets.USER_DM_BLOCKED,
+    osuTypes.string,  # sender
+    osuTypes.string,  # msg
+    osuTypes.string,  # recipient
+    osuTypes.i32,  # sender_id
+)
+
+
 def user_dm_blocked(target: str) -> bytes:
-    return write(ServerPackets.USER_DM_BLOCKED, (("", "", target, 0), osuTypes.message))
+    return _encode_user_dm_blocked("", "", target, 0)
 
 
 # packet id: 101
+_encode_target_silenced = compile_packet(
+    ServerPackets.TARGET_IS_SILENCED,
+    osuTypes.string,  # sender
+    osuTypes.string,  # msg
+    osuTypes.string,  # recipient
+    osuTypes.i32,  # sender_id
+)
+
+
 def target_silenced(target: str) -> bytes:
-    return write(
-        ServerPackets.TARGET_IS_SILENCED,
-        (("", "", target, 0), osuTypes.message),
-    )
+    return _encode_target_silenced("", "", target, 0)
 
 
 # packet id: 102
 @cache
 def version_update_forced() -> bytes:
-    return write(ServerPackets.VERSION_UPDATE_FORCED)
+    return compile_packet(ServerPackets.VERSION_UPDATE_FORCED)()
 
 
 # packet id: 103
+_encode_switch_server = compile_packet(ServerPackets.SWITCH_SERVER, osuTypes.i32)
+
+
 def switch_server(t: int) -> bytes:
     # increment endpoint index if
     # idletime >= t && match == null
-    return write(ServerPackets.SWITCH_SERVER, (t, osuTypes.i32))
+    return _encode_switch_server(t)
 
 
 # packet id: 104
 @cache
 def account_restricted() -> bytes:
-    return write(ServerPackets.ACCOUNT_RESTRICTED)
+    return compile_packet(ServerPackets.ACCOUNT_RESTRICTED)()
 
 
 # packet id: 105
 # NOTE: deprecated
+_encode_rtx = compile_packet(ServerPackets.RTX, osuTypes.string)
+
+
 def rtx(msg: str) -> bytes:
     # a bit of a weird one, sends a request to the client
     # to show some visual effects on screen for 5 seconds:
     # - black screen, freezes game, beeps loudly.
     # within the next 3-8 seconds at random.
-    return write(ServerPackets.RTX, (msg, osuTypes.string))
+    return _encode_rtx(msg)
 
 
 # packet id: 106
 @cache
 def match_abort() -> bytes:
-    return write(ServerPackets.MATCH_ABORT)
+    return compile_packet(ServerPackets.MATCH_ABORT)()
 
 
 # packet id: 107
+_encode_switch_tournament_server = compile_packet(
+    ServerPackets.SWITCH_TOURNAMENT_SERVER,
+    osuTypes.string,
+)
+
+
 def switch_tournament_server(ip: str) -> bytes:
     # the client only reads the string if it's
     # not on the client's normal endpoints,
     # but we can send it either way xd.
-    return write(ServerPackets.SWITCH_TOURNAMENT_SERVER, (ip, osuTypes.string))
+    return _encode_switch_tournament_server(ip)
@@ -6,6 +6,7 @@ from typing import cast
 from sqlalchemy import Column
 from sqlalchemy import Integer
 from sqlalchemy import String
+from sqlalchemy import func
 from sqlalchemy import insert
 from sqlalchemy import select
 from sqlalchemy.dialects.mysql import TINYINT
@@ -35,6 +36,11 @@ class Rating(TypedDict):
     rating: int
 
 
+class RatingAggregate(TypedDict):
+    count: int
+    total: int
+
+
 async def create(userid: int, map_md5: str, rating: int) -> Rating:
     """Create a new rating."""
     insert_stmt = insert(RatingsTable).values(
@@ -83,3 +89,15 @@ async def fetch_one(userid: int, map_md5: str) -> Rating | None:
     )
     rating = await app.state.services.database.fetch_one(select_stmt)
     return cast(Rating | None, rating)
+
+
+async def fetch_aggregate(map_md5: str) -> RatingAggregate:
+    """Fetch the number & sum of a map's ratings."""
+    select_stmt = select(
+        func.count().label("count"),
+        func.coalesce(func.sum(RatingsTable.rating), 0).label("total"),
+    ).where(RatingsTable.map_md5 == map_md5)
+
+    rec = await app.state.services.database.fetch_one(select_stmt)
+    assert rec is not None
+    return {"count": rec["count"], "total": int(rec["total"])}
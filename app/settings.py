@@ -56,12 +56,28 @@ DISALLOWED_PASSWORDS = read_list(os.environ["DISALLOWED_PASSWORDS"])
 DISALLOW_OLD_CLIENTS = read_bool(os.environ["DISALLOW_OLD_CLIENTS"])
 DISALLOW_INGAME_REGISTRATION = read_bool(os.environ["DISALLOW_INGAME_REGISTRATION"])
 
+# the number of threads bcrypt hashing & verification may use at once
+BCRYPT_MAX_THREADS = int(os.environ.get("BCRYPT_MAX_THREADS") or 4)
+
+# the max size & lifetime (in seconds) of the verified credentials cache
+BCRYPT_CACHE_MAX_ENTRIES = int(os.environ.get("BCRYPT_CACHE_MAX_ENTRIES") or 10_000)
+BCRYPT_CACHE_TTL = int(os.environ.get("BCRYPT_CACHE_TTL") or 60 * 60 * 24)
+
+# the number of processes pp calculation may use, and the number of
+# calculations which may be pending at once; past which, any others
+# (besides those for score submission) are rejected rather than queued
+PP_CALC_MAX_WORKERS = int(os.environ.get("PP_CALC_MAX_WORKERS") or 2)
+PP_CALC_MAX_QUEUE = int(os.environ.get("PP_CALC_MAX_QUEUE") or 32)
+
 DISCORD_AUDIT_LOG_WEBHOOK = os.environ["DISCORD_AUDIT_LOG_WEBHOOK"]
 
 AUTOMATICALLY_REPORT_PROBLEMS = read_bool(os.environ["AUTOMATICALLY_REPORT_PROBLEMS"])
 
 LOG_WITH_COLORS = read_bool(os.environ["LOG_WITH_COLORS"])
 
+# an optional maxmind (.mmdb) database, for geolocation without any network calls
+MMD_DB_PATH = os.environ.get("MMD_DB_PATH") or None
+
 # advanced dev settings
 
 ## WARNING touch this once you've
@@ -1,13 +1,181 @@
 from __future__ import annotations
 
+import time
+from collections import OrderedDict
 from typing import TYPE_CHECKING
+from typing import Any
+from typing import NamedTuple
+
+import app.settings
 
 if TYPE_CHECKING:
     from app.objects.beatmap import Beatmap
     from app.objects.beatmap import BeatmapSet
 
 
-bcrypt: dict[bytes, bytes] = {}  # {bcrypt: md5, ...}
+class CredentialCache:
+    """\
+    A bounded cache of verified credentials ({bcrypt: md5}), allowing
+    us to skip bcrypt (~200ms) for recently verified passwords.
+
+    Entries are evicted least-recently-used past `max_entries`, and
+    expire `ttl` seconds after they were verified with bcrypt.
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        # {bcrypt: (md5, expiry time), ...}, least recently used first
+        self._entries: OrderedDict[bytes, tuple[bytes, float]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0  # size of the keys & values held
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """The ratio of lookups which were served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, pw_bcrypt: bytes) -> bytes | None:
+        """Get the md5 `pw_bcrypt` was verified against, if cached."""
+        entry = self._entries.get(pw_bcrypt)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        pw_md5, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.invalidate(pw_bcrypt)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(pw_bcrypt)
+        self.hits += 1
+        return pw_md5
+
+    def set(self, pw_bcrypt: bytes, pw_md5: bytes) -> None:
+        """Cache that `pw_md5` was verified against `pw_bcrypt`."""
+        self.invalidate(pw_bcrypt)
+
+        self._entries[pw_bcrypt] = (pw_md5, time.monotonic() + self.ttl)
+        self.nbytes += len(pw_bcrypt) + len(pw_md5)
+
+        while len(self._entries) > self.max_entries:
+            evicted_bcrypt, (evicted_md5, _) = self._entries.popitem(last=False)
+            self.nbytes -= len(evicted_bcrypt) + len(evicted_md5)
+
+    def invalidate(self, pw_bcrypt: bytes) -> None:
+        """Remove `pw_bcrypt` from the cache; e.g. on password changes."""
+        entry = self._entries.pop(pw_bcrypt, None)
+        if entry is not None:
+            self.nbytes -= len(pw_bcrypt) + len(entry[0])
+
+
+class RenderedLeaderboard(NamedTuple):
+    rows: list[dict[str, Any]]
+    listing: bytes  # the rows' lines of an osu-osz2-getscores.php response
+
+
+class LeaderboardCache:
+    """\
+    A bounded cache of beatmap leaderboards' top score rows (& their
+    rendered listing), keyed by map md5 & then by (mode, leaderboard
+    type, mods/country).
+
+    Maps are evicted least-recently-used past `max_maps`, and rows
+    expire `ttl` seconds after being fetched, bounding staleness
+    from changes made outside of the server (e.g. pp recalcs).
+    """
+
+    def __init__(self, max_maps: int, ttl: float) -> None:
+        self.max_maps = max_maps
+        self.ttl = ttl
+
+        # {md5: {key: (leaderboard, expiry time), ...}, ...}, least recently used first
+        self._maps: OrderedDict[
+            str,
+            dict[tuple[Any, ...], tuple[RenderedLeaderboard, float]],
+        ] = OrderedDict()
+
+        # bumped on each invalidation, so that rows fetched
+        # before one are not cached after it has happened.
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+    def get(
+        self,
+        map_md5: str,
+        key: tuple[Any, ...],
+    ) -> RenderedLeaderboard | None:
+        """Get a cached leaderboard; its rows must not be mutated."""
+        leaderboards = self._maps.get(map_md5)
+        if leaderboards is None or key not in leaderboards:
+            self.misses += 1
+            return None
+
+        leaderboard, expires_at = leaderboards[key]
+        if expires_at <= time.monotonic():
+            del leaderboards[key]
+            self.misses += 1
+            return None
+
+        self._maps.move_to_end(map_md5)
+        self.hits += 1
+        return leaderboard
+
+    def set(
+        self,
+        map_md5: str,
+        key: tuple[Any, ...],
+        leaderboard: RenderedLeaderboard,
+        generation: int,
+    ) -> None:
+        """Cache a leaderboard, fetched during `generation`."""
+        if generation != self.generation:
+            return  # (possibly) invalidated while being fetched
+
+        leaderboards = self._maps.setdefault(map_md5, {})
+        leaderboards[key] = (leaderboard, time.monotonic() + self.ttl)
+        self._maps.move_to_end(map_md5)
+
+        while len(self._maps) > self.max_maps:
+            self._maps.popitem(last=False)
+
+    def invalidate_map(self, map_md5: str) -> None:
+        """Drop all leaderboards of a map; e.g. on new best scores."""
+        self.generation += 1
+        self._maps.pop(map_md5, None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop all leaderboards listing a user; e.g. on name or clan changes."""
+        self.generation += 1
+        for leaderboards in self._maps.values():
+            for key, (leaderboard, _) in list(leaderboards.items()):
+                if any(row["userid"] == user_id for row in leaderboard.rows):
+                    del leaderboards[key]
+
+    def clear(self) -> None:
+        """Drop all leaderboards; e.g. when a user's scores are made visible."""
+        self.generation += 1
+        self._maps.clear()
+
+
+bcrypt = CredentialCache(
+    max_entries=app.settings.BCRYPT_CACHE_MAX_ENTRIES,
+    ttl=app.settings.BCRYPT_CACHE_TTL,
+)
+leaderboards = LeaderboardCache(max_maps=1024, ttl=10 * 60)
 beatmap: dict[str | int, Beatmap] = {}  # {md5: map, id: map, ...}
 beatmapset: dict[int, BeatmapSet] = {}  # {bsid: map_set}
 unsubmitted: set[str] = set()  # {md5, ...}
@@ -2,19 +2,26 @@ from __future__ import annotations
 
 import ipaddress
 import logging
+import multiprocessing
 import pickle
 import re
 import secrets
+from collections import OrderedDict
 from collections.abc import AsyncGenerator
+from collections.abc import Callable
 from collections.abc import Mapping
 from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import TYPE_CHECKING
+from typing import Any
 from typing import TypedDict
 
 import datadog as datadog_module
 import datadog.threadstats.base as datadog_client
 import httpx
+import maxminddb
 import pymysql
 from redis import asyncio as aioredis
 
@@ -33,17 +40,78 @@ SQL_UPDATES_FILE = Path.cwd() / "migrations/migrations.sql"
 
 """ session objects """
 
-http_client = httpx.AsyncClient()
-database = Database(app.settings.DB_DSN)
-redis: aioredis.Redis = aioredis.from_url(app.settings.REDIS_DSN)
+# these are created on first use rather than on import, as the pp calculation
+# workers are spawned processes which import the app (including this module),
+# but don't use any of them.
+http_client: httpx.AsyncClient
+database: Database
+redis: aioredis.Redis
+bcrypt_executor: ThreadPoolExecutor
+performance_executor: ProcessPoolExecutor
+geoloc_db: maxminddb.Reader | None
+datadog: datadog_client.ThreadStats | None
+
+
+def _create_bcrypt_executor() -> ThreadPoolExecutor:
+    # bcrypt is intentionally slow (~200ms), and must not block the event loop
+    return ThreadPoolExecutor(
+        max_workers=app.settings.BCRYPT_MAX_THREADS,
+        thread_name_prefix="bcrypt",
+    )
+
+
+def _create_performance_executor() -> ProcessPoolExecutor:
+    # pp calculation is cpu-bound & holds the gil, so it runs in separate processes
+    # (spawned rather than forked, as we have threads running by the time they start)
+    return ProcessPoolExecutor(
+        max_workers=app.settings.PP_CALC_MAX_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _create_geoloc_db() -> maxminddb.Reader | None:
+    if not app.settings.MMD_DB_PATH:
+        return None
+
+    if not Path(app.settings.MMD_DB_PATH).is_file():
+        log(f"Maxmind database not found at {app.settings.MMD_DB_PATH}.", Ansi.LRED)
+        return None
+
+    # memory-mapped, so lookups are served from the page cache
+    return maxminddb.open_database(app.settings.MMD_DB_PATH, maxminddb.MODE_MMAP)
+
+
+def _create_datadog() -> datadog_client.ThreadStats | None:
+    if not (str(app.settings.DATADOG_API_KEY) and str(app.settings.DATADOG_APP_KEY)):
+        return None
 
-datadog: datadog_client.ThreadStats | None = None
-if str(app.settings.DATADOG_API_KEY) and str(app.settings.DATADOG_APP_KEY):
     datadog_module.initialize(
         api_key=str(app.settings.DATADOG_API_KEY),
         app_key=str(app.settings.DATADOG_APP_KEY),
     )
-    datadog = datadog_client.ThreadStats()
+    return datadog_client.ThreadStats()
+
+
+_SESSION_OBJECT_FACTORIES: dict[str, Callable[[], Any]] = {
+    "http_client": httpx.AsyncClient,
+    "database": lambda: Database(app.settings.DB_DSN),
+    "redis": lambda: aioredis.from_url(app.settings.REDIS_DSN),
+    "bcrypt_executor": _create_bcrypt_executor,
+    "performance_executor": _create_performance_executor,
+    "geoloc_db": _create_geoloc_db,
+    "datadog": _create_datadog,
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Create a session object on its first use."""
+    factory = _SESSION_OBJECT_FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    session_object = globals()[name] = factory()
+    return session_object
+
 
 ip_resolver: IPResolver
 
@@ -99,6 +167,12 @@ country_codes = {
 # fmt: on
 
 
+# {ip: geoloc, ...}, least recently used first; for
+# geolocations not provided by the reverse proxy.
+GEOLOC_CACHE_SIZE = 4096
+_geoloc_cache: OrderedDict[IPAddress, Geolocation] = OrderedDict()
+
+
 class IPResolver:
     def __init__(self) -> None:
         self.cache: MutableMapping[str, IPAddress] = {}
@@ -132,7 +206,21 @@ async def fetch_geoloc(
         geoloc = _fetch_geoloc_from_headers(headers)
 
     if geoloc is None:
-        geoloc = await _fetch_geoloc_from_ip(ip)
+        geoloc = _geoloc_cache.get(ip)
+        if geoloc is not None:
+            _geoloc_cache.move_to_end(ip)
+            return geoloc
+
+        if app.state.services.geoloc_db is not None:
+            geoloc = _fetch_geoloc_from_db(ip)
+
+        if geoloc is None:
+            geoloc = await _fetch_geoloc_from_ip(ip)
+
+        if geoloc is not None:
+            _geoloc_cache[ip] = geoloc
+            if len(_geoloc_cache) > GEOLOC_CACHE_SIZE:
+                _geoloc_cache.popitem(last=False)
 
     return geoloc
 
@@ -189,6 +277,44 @@ def __fetch_geoloc_nginx(headers: Mapping[str, str]) -> Geolocation | None:
     }
 
 
+def _fetch_geoloc_from_db(ip: IPAddress) -> Geolocation | None:
+    """Fetch geolocation data based on ip (using the maxmind database)."""
+    assert app.state.services.geoloc_db is not None
+
+    record = app.state.services.geoloc_db.get(ip)
+    if not isinstance(record, dict):
+        return None
+
+    country = record.get("country")
+    if not isinstance(country, dict):
+        return None
+
+    iso_code = country.get("iso_code")
+    if not isinstance(iso_code, str):
+        return None
+
+    country_acronym = iso_code.lower()
+    if country_acronym not in country_codes:
+        return None
+
+    # country databases have no location; leave it at 0,0
+    location = record.get("location")
+    if not isinstance(location, dict):
+        location = {}
+
+    latitude = location.get("latitude", 0.0)
+    longitude = location.get("longitude", 0.0)
+
+    return {
+        "latitude": float(latitude) if isinstance(latitude, (int, float)) else 0.0,
+        "longitude": float(longitude) if isinstance(longitude, (int, float)) else 0.0,
+        "country": {
+            "acronym": country_acronym,
+            "numeric": country_codes[country_acronym],
+        },
+    }
+
+
 async def _fetch_geoloc_from_ip(ip: IPAddress) -> Geolocation | None:
     """Fetch geolocation data based on ip (using ip-api)."""
     if not ip.is_private:
@@ -196,7 +322,7 @@ async def _fetch_geoloc_from_ip(ip: IPAddress) -> Geolocation | None:
     else:
         url = "http://ip-api.com/line/"
 
-    response = await http_client.get(
+    response = await app.state.services.http_client.get(
         url,
         params={
             "fields": ",".join(("status", "message", "countryCode", "lat", "lon")),
@@ -234,7 +360,7 @@ async def log_strange_occurrence(obj: object) -> None:
 
     if app.settings.AUTOMATICALLY_REPORT_PROBLEMS:
         # automatically reporting problems to cmyui's server
-        response = await http_client.post(
+        response = await app.state.services.http_client.post(
             url="https://log.cmyui.xyz/",
             headers={
                 "Bancho-Version": app.settings.VERSION,
@@ -347,7 +473,7 @@ async def _get_latest_dependency_versions() -> AsyncGenerator[
 
         # TODO: split up and do the requests asynchronously
         url = f"https://pypi.org/pypi/{dependency_name}/json"
-        response = await http_client.get(url)
+        response = await app.state.services.http_client.get(url)
         json = response.json()
 
         if response.status_code == 200 and json:
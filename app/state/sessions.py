@@ -7,6 +7,7 @@ from typing import Any
 from app.logging import Ansi
 from app.logging import log
 from app.objects.collections import Channels
+from app.objects.collections import Clans
 from app.objects.collections import Matches
 from app.objects.collections import Players
 
@@ -15,6 +16,7 @@ if TYPE_CHECKING:
 
 players = Players()
 channels = Channels()
+clans = Clans()
 matches = Matches()
 
 api_keys: dict[str, int] = {}
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import bisect
+import operator
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from dataclasses import field
+
+import app.state
+from app.constants.gamemodes import GameMode
+
+# how many (user, mode) indices to keep in memory at once.
+BEST_SCORES_MAX_ENTRIES = 1024
+
+# how long an index may be used before it's reloaded; this bounds
+# how stale we may be after changes made outside of the server,
+# such as pp recalculations by tools/recalc.py.
+BEST_SCORES_TTL = 60 * 60
+
+# 0.95**i for each position in a player's best scores
+SCORE_WEIGHTS: list[float] = []
+
+
+@dataclass
+class BestScores:
+    """A player's best ranked scores in a mode, sorted by pp descending."""
+
+    ids: list[int] = field(default_factory=list)
+    pps: list[float] = field(default_factory=list)
+    accs: list[float] = field(default_factory=list)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def add(self, score_id: int, pp: float, acc: float) -> None:
+        # after any scores of equal pp
+        idx = bisect.bisect_right(self.pps, -pp, key=operator.neg)
+        self.ids.insert(idx, score_id)
+        self.pps.insert(idx, pp)
+        self.accs.insert(idx, acc)
+
+    def remove(self, score_id: int) -> None:
+        try:
+            idx = self.ids.index(score_id)
+        except ValueError:
+            return
+
+        del self.ids[idx]
+        del self.pps[idx]
+        del self.accs[idx]
+
+
+# {(user_id, mode): best scores, ...}, least recently used first
+_best_scores: OrderedDict[tuple[int, GameMode], BestScores] = OrderedDict()
+
+
+def calculate_totals(
+    pps: Sequence[float],
+    accs: Sequence[float],
+) -> tuple[int, float]:
+    """Calculate a player's total pp & accuracy from their best scores, by pp."""
+    total_scores = len(pps)
+    if total_scores == 0:
+        return 0, 0.0
+
+    # 0.95 ** i for the i-th best score, computed once for all players
+    while len(SCORE_WEIGHTS) < total_scores:
+        SCORE_WEIGHTS.append(0.95 ** len(SCORE_WEIGHTS))
+
+    # calculate new total weighted accuracy
+    weighted_acc = sum(map(operator.mul, accs, SCORE_WEIGHTS))
+    bonus_acc = 100.0 / (20 * (1 - 0.95**total_scores))
+    acc = (weighted_acc * bonus_acc) / 100
+
+    # calculate new total weighted pp
+    weighted_pp = sum(map(operator.mul, pps, SCORE_WEIGHTS))
+    bonus_pp = 416.6667 * (1 - 0.9994**total_scores)
+    pp = round(weighted_pp + bonus_pp)
+
+    return pp, acc
+
+
+async def _fetch_best_scores(user_id: int, mode: GameMode) -> BestScores:
+    # NOTE: we select all plays (and not just top100)
+    # because bonus pp counts the total amount of ranked scores.
+    rows = await app.state.services.database.fetch_all(
+        "SELECT s.id, s.pp, s.acc FROM scores s "
+        "INNER JOIN maps m ON s.map_md5 = m.md5 "
+        "WHERE s.userid = :user_id AND s.mode = :mode "
+        "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
+        "ORDER BY s.pp DESC",
+        {"user_id": user_id, "mode": mode},
+    )
+
+    return BestScores(
+        ids=[row["id"] for row in rows],
+        pps=[row["pp"] for row in rows],
+        accs=[row["acc"] for row in rows],
+    )
+
+
+async def submit_best_score(
+    user_id: int,
+    mode: GameMode,
+    score_id: int,
+    pp: float,
+    acc: float,
+    prev_best_id: int | None = None,
+) -> tuple[int, float]:
+    """\
+    Record a new best ranked score (replacing `prev_best_id`, if any),
+    returning the player's new total pp & acc in the mode.
+
+    The score must already be stored in sql with status = 2.
+    """
+    key = (user_id, mode)
+    best_scores = _best_scores.get(key)
+
+    if (
+        best_scores is None
+        or time.monotonic() - best_scores.loaded_at > BEST_SCORES_TTL
+    ):
+        # the new score is already in sql, so there's nothing to apply
+        best_scores = await _fetch_best_scores(user_id, mode)
+        _best_scores[key] = best_scores
+    else:
+        if prev_best_id is not None:
+            best_scores.remove(prev_best_id)
+
+        best_scores.add(score_id, pp, acc)
+
+    _best_scores.move_to_end(key)
+    while len(_best_scores) > BEST_SCORES_MAX_ENTRIES:
+        _best_scores.popitem(last=False)
+
+    return calculate_totals(best_scores.pps, best_scores.accs)
+
+
+def invalidate() -> None:
+    """Drop every index; e.g. when scores start or stop awarding pp."""
+    _best_scores.clear()
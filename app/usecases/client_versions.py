@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import date
+
+import httpx
+
+import app.state
+from app.logging import Ansi
+from app.logging import log
+from app.objects.player import OsuStream
+
+OSU_API_V2_CHANGELOG_URL = "https://osu.ppy.sh/api/v2/changelog"
+
+# how long fetched versions are considered fresh; stale versions
+# are still served while they're refreshed in the background.
+ALLOWED_CLIENT_VERSIONS_TTL = 60 * 60
+
+# {stream: (allowed versions, fetch time), ...}
+_allowed_client_versions: dict[OsuStream, tuple[set[date], float]] = {}
+
+# {stream: fetch, ...}; concurrent misses share a single request.
+_fetches_in_flight: dict[OsuStream, asyncio.Task[set[date] | None]] = {}
+
+
+async def _fetch_allowed_client_versions(osu_stream: OsuStream) -> set[date] | None:
+    """Fetch the acceptable client versions for a stream from the osu! api."""
+    osu_stream_str = osu_stream.value
+    if osu_stream in (OsuStream.STABLE, OsuStream.BETA):
+        osu_stream_str += "40"  # i wonder why this exists
+
+    try:
+        response = await app.state.services.http_client.get(
+            OSU_API_V2_CHANGELOG_URL,
+            params={"stream": osu_stream_str},
+        )
+    except httpx.HTTPError as exc:
+        log(f"Failed to fetch {osu_stream_str} changelog: {exc}", Ansi.LRED)
+        return None
+
+    if not response.is_success:
+        return None
+
+    allowed_client_versions: set[date] = set()
+    try:
+        for build in response.json()["builds"]:
+            version = date(
+                int(build["version"][0:4]),
+                int(build["version"][4:6]),
+                int(build["version"][6:8]),
+            )
+            allowed_client_versions.add(version)
+            if any(entry["major"] for entry in build["changelog_entries"]):
+                # this build is a major iteration to the client
+                # don't allow anything older than this
+                break
+    except (KeyError, TypeError, ValueError) as exc:  # (incl. JSONDecodeError)
+        log(f"Failed to parse {osu_stream_str} changelog: {exc!r}", Ansi.LRED)
+        return None
+
+    return allowed_client_versions
+
+
+async def _refresh(osu_stream: OsuStream) -> set[date] | None:
+    """Fetch & cache the versions for a stream, keeping any stale ones on failure."""
+    allowed_client_versions = await _fetch_allowed_client_versions(osu_stream)
+    if allowed_client_versions is None:
+        cached = _allowed_client_versions.get(osu_stream)
+        return cached[0] if cached is not None else None
+
+    _allowed_client_versions[osu_stream] = (allowed_client_versions, time.time())
+    return allowed_client_versions
+
+
+def refresh(osu_stream: OsuStream) -> asyncio.Task[set[date] | None]:
+    """Start refreshing the versions for a stream, unless already underway."""
+    task = _fetches_in_flight.get(osu_stream)
+    if task is None:
+        task = asyncio.create_task(_refresh(osu_stream))
+        task.add_done_callback(lambda _: _fetches_in_flight.pop(osu_stream, None))
+        _fetches_in_flight[osu_stream] = task
+
+    return task
+
+
+async def get_allowed_client_versions(osu_stream: OsuStream) -> set[date] | None:
+    """
+    Return a list of acceptable client versions for the given stream.
+
+    This is used to determine whether a client is too old to connect to the server.
+
+    Returns None if the connection to the osu! api fails.
+    """
+    cached = _allowed_client_versions.get(osu_stream)
+    if cached is None:
+        # shield the shared fetch from cancellation of any one waiter
+        return await asyncio.shield(refresh(osu_stream))
+
+    allowed_client_versions, fetched_at = cached
+    if time.time() - fetched_at > ALLOWED_CLIENT_VERSIONS_TTL:
+        refresh(osu_stream)  # serve the stale versions meanwhile
+
+    return allowed_client_versions
+
+
+async def refresh_all() -> None:
+    """Refresh the versions of every stream we've served."""
+    await asyncio.gather(*[refresh(stream) for stream in _allowed_client_versions])
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from typing import TypeVar
+
+import bcrypt
+
+import app.settings
+import app.state
+
+T = TypeVar("T")
+
+# {(bcrypt, md5): verification, ...}; concurrent verifications
+# of the same credentials share a single bcrypt computation.
+_verifications_in_flight: dict[tuple[bytes, bytes], asyncio.Future[bool]] = {}
+
+# the number of bcrypt calls submitted to the executor & not yet finished
+_pending_calls = 0
+
+
+async def _run_in_executor(func: Callable[[bytes, bytes], T], a: bytes, b: bytes) -> T:
+    """Run a bcrypt function in the dedicated executor, reporting metrics."""
+    global _pending_calls
+
+    submitted_at = time.perf_counter()
+    wait_time = 0.0
+
+    def run() -> T:
+        nonlocal wait_time
+        wait_time = time.perf_counter() - submitted_at
+        return func(a, b)
+
+    _pending_calls += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            app.state.services.bcrypt_executor,
+            run,
+        )
+    finally:
+        _pending_calls -= 1
+
+        if app.state.services.datadog:
+            queue_depth = max(0, _pending_calls - app.settings.BCRYPT_MAX_THREADS)
+            app.state.services.datadog.gauge("bancho.bcrypt.queue_depth", queue_depth)
+            app.state.services.datadog.histogram("bancho.bcrypt.wait_time", wait_time)
+
+
+async def verify_password(untrusted_password: bytes, trusted_hashword: bytes) -> bool:
+    """Check `untrusted_password` against `trusted_hashword`, off the event loop."""
+    key = (trusted_hashword, untrusted_password)
+
+    verification = _verifications_in_flight.get(key)
+    if verification is None:
+        verification = asyncio.ensure_future(
+            _run_in_executor(bcrypt.checkpw, untrusted_password, trusted_hashword),
+        )
+        _verifications_in_flight[key] = verification
+        verification.add_done_callback(lambda _: _verifications_in_flight.pop(key))
+
+    # shield the shared verification from the cancellation of any one waiter
+    return await asyncio.shield(verification)
+
+
+async def hash_password(password: bytes) -> bytes:
+    """Hash `password` with a new salt, off the event loop."""
+    return await _run_in_executor(bcrypt.hashpw, password, bcrypt.gensalt())
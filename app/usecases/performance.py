@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import math
+import os
+import time
+from collections import OrderedDict
 from collections.abc import Iterable
+from collections.abc import Mapping
 from dataclasses import dataclass
 from typing import TypedDict
 
 from akatsuki_pp_py import Beatmap
 from akatsuki_pp_py import Calculator
+from akatsuki_pp_py import DifficultyAttributes
 
+import app.settings
+import app.state
 from app.constants.mods import Mods
 
 
@@ -57,20 +65,134 @@ class PerformanceResult(TypedDict):
     difficulty: DifficultyRating
 
 
+CACHED_ACCURACIES_MAX_ENTRIES = 4096
+
+# {(md5, mode, mods): {acc: result, ...}, ...}, least recently used first;
+# results for each of the server's PP_CACHED_ACCURACIES, without misses.
+_cached_accuracy_results: OrderedDict[
+    tuple[str, int, int],
+    dict[float, PerformanceResult],
+] = OrderedDict()
+
+# the calculations submitted to the worker processes, and not yet completed
+_calculations_pending = 0
+
+
+class PerformanceQueueFull(Exception):
+    """Raised when a calculation is shed, as PP_CALC_MAX_QUEUE are pending."""
+
+
+# the limits of each process' cache of parsed beatmaps; as the size of
+# a parsed beatmap scales with its .osu file, we bound those in total.
+BEATMAP_CACHE_MAX_ENTRIES = 128
+BEATMAP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# {(osu file path, md5): (file mtime, file size, beatmap), ...}, least recently used first
+_beatmaps: OrderedDict[tuple[str, str], tuple[int, int, Beatmap]] = OrderedDict()
+_beatmaps_nbytes = 0
+
+# the mods which affect a beatmap's difficulty attributes; the remainder
+# (e.g. nf, so, sd) only affect the performance calculated from them.
+DIFFICULTY_MODS = (
+    Mods.EASY
+    | Mods.TOUCHSCREEN
+    | Mods.HIDDEN
+    | Mods.HARDROCK
+    | Mods.DOUBLETIME
+    | Mods.RELAX
+    | Mods.HALFTIME
+    | Mods.FLASHLIGHT
+    | Mods.AUTOPILOT
+)
+
+DIFFICULTY_CACHE_MAX_ENTRIES = 1024
+
+# {(md5, mode, difficulty mods): attributes, ...}, least recently used first
+_difficulties: OrderedDict[tuple[str, int, int], DifficultyAttributes] = OrderedDict()
+
+
+def _get_beatmap(osu_file_path: str, beatmap_md5: str | None) -> Beatmap:
+    """Parse a beatmap, or re-use our last parse if its file is unchanged."""
+    global _beatmaps_nbytes
+
+    if beatmap_md5 is None:
+        return Beatmap(path=osu_file_path)
+
+    key = (osu_file_path, beatmap_md5)
+    stat = os.stat(osu_file_path)
+
+    cached = _beatmaps.get(key)
+    if cached is not None:
+        mtime, size, beatmap = cached
+        if mtime == stat.st_mtime_ns:
+            _beatmaps.move_to_end(key)
+            return beatmap
+
+        # the file has been rewritten since; parse it again
+        del _beatmaps[key]
+        _beatmaps_nbytes -= size
+
+        for difficulty_key in [k for k in _difficulties if k[0] == beatmap_md5]:
+            del _difficulties[difficulty_key]
+
+    beatmap = Beatmap(path=osu_file_path)
+    _beatmaps[key] = (stat.st_mtime_ns, stat.st_size, beatmap)
+    _beatmaps_nbytes += stat.st_size
+
+    while (
+        len(_beatmaps) > BEATMAP_CACHE_MAX_ENTRIES
+        or _beatmaps_nbytes > BEATMAP_CACHE_MAX_BYTES
+    ):
+        _, (_, evicted_size, _) = _beatmaps.popitem(last=False)
+        _beatmaps_nbytes -= evicted_size
+
+    return beatmap
+
+
+def _get_difficulty(
+    calculator: Calculator,
+    beatmap: Beatmap,
+    beatmap_md5: str,
+    mode: int,
+    mods: int,
+) -> DifficultyAttributes:
+    """Calculate a beatmap's difficulty, or re-use our last calculation."""
+    key = (beatmap_md5, mode, mods & DIFFICULTY_MODS)
+
+    difficulty = _difficulties.get(key)
+    if difficulty is not None:
+        _difficulties.move_to_end(key)
+        return difficulty
+
+    difficulty = calculator.difficulty(beatmap)
+    _difficulties[key] = difficulty
+
+    if len(_difficulties) > DIFFICULTY_CACHE_MAX_ENTRIES:
+        _difficulties.popitem(last=False)
+
+    return difficulty
+
+
 def calculate_performances(
     osu_file_path: str,
     scores: Iterable[ScoreParams],
+    beatmap_md5: str | None = None,
 ) -> list[PerformanceResult]:
     """\
     Calculate performance for multiple scores on a single beatmap.
 
-    Typically most useful for mass-recalculation situations.
+    Typically most useful for mass-recalculation situations. This blocks
+    for as long as the calculation takes; from the event loop, use
+    `calculate_performances_in_pool` instead.
+
+    If the beatmap's md5 is given, its parse & difficulty for the
+    scores' mode and mods are cached for future calls.
 
     TODO: Some level of error handling & returning to caller should be
     implemented here to handle cases where e.g. the beatmap file is invalid
     or there an issue during calculation.
     """
-    calc_bmap = Beatmap(path=osu_file_path)
+    calc_bmap = _get_beatmap(osu_file_path, beatmap_md5)
 
     results: list[PerformanceResult] = []
 
@@ -99,6 +221,18 @@ def calculate_performances(
             n_katu=score.nkatu,
             n_misses=score.nmiss,
         )
+
+        if beatmap_md5 is not None:
+            calculator.set_difficulty(
+                _get_difficulty(
+                    calculator,
+                    calc_bmap,
+                    beatmap_md5,
+                    score.mode,
+                    score.mods or 0,
+                ),
+            )
+
         result = calculator.performance(calc_bmap)
 
         pp = result.pp
@@ -136,3 +270,81 @@ def calculate_performances(
         )
 
     return results
+
+
+async def calculate_performances_in_pool(
+    osu_file_path: str,
+    scores: Iterable[ScoreParams],
+    beatmap_md5: str | None = None,
+    sheddable: bool = True,
+) -> list[PerformanceResult]:
+    """\
+    Calculate performance for scores on a beatmap, in a worker process.
+
+    Raises `PerformanceQueueFull` rather than queueing the calculation if
+    `PP_CALC_MAX_QUEUE` are already pending, unless it isn't `sheddable`.
+    """
+    global _calculations_pending
+
+    if sheddable and _calculations_pending >= app.settings.PP_CALC_MAX_QUEUE:
+        if app.state.services.datadog:
+            app.state.services.datadog.increment("bancho.performance.shed")
+
+        raise PerformanceQueueFull
+
+    started_at = time.perf_counter()
+
+    _calculations_pending += 1
+    try:
+        results = await asyncio.get_running_loop().run_in_executor(
+            app.state.services.performance_executor,
+            calculate_performances,
+            osu_file_path,
+            list(scores),
+            beatmap_md5,
+        )
+    finally:
+        _calculations_pending -= 1
+
+    if app.state.services.datadog:
+        app.state.services.datadog.histogram(
+            "bancho.performance.calc_time",
+            time.perf_counter() - started_at,
+        )
+
+    return results
+
+
+async def get_cached_accuracy_performances(
+    osu_file_path: str,
+    beatmap_md5: str,
+    mode: int,
+    mods: int,
+) -> Mapping[float, PerformanceResult]:
+    """\
+    Get the performance of full combo scores at each of the server's
+    `PP_CACHED_ACCURACIES` on a beatmap, calculating them on first use.
+    """
+    key = (beatmap_md5, mode, mods)
+
+    results = _cached_accuracy_results.get(key)
+    if results is not None:
+        _cached_accuracy_results.move_to_end(key)
+        return results
+
+    calculated = await calculate_performances_in_pool(
+        osu_file_path,
+        [
+            ScoreParams(mode=mode, mods=mods, acc=acc)
+            for acc in app.settings.PP_CACHED_ACCURACIES
+        ],
+        beatmap_md5,
+    )
+
+    results = dict(zip(app.settings.PP_CACHED_ACCURACIES, calculated))
+    _cached_accuracy_results[key] = results
+
+    if len(_cached_accuracy_results) > CACHED_ACCURACIES_MAX_ENTRIES:
+        _cached_accuracy_results.popitem(last=False)
+
+    return results
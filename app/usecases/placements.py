@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+
+import app.state
+from app.constants.gamemodes import GameMode
+
+# how many (map, mode) indices to keep in memory at once.
+PLACEMENTS_MAX_ENTRIES = 512
+
+# how long an index may be used before it's reloaded; this bounds
+# how stale we may be after changes made outside of the server,
+# such as pp recalculations by tools/recalc.py.
+PLACEMENTS_TTL = 10 * 60
+
+
+@dataclass
+class MapPlacements:
+    """The unrestricted best scores on a map in a mode, for ranking scores."""
+
+    values: list[float] = field(default_factory=list)  # ascending
+    by_user: dict[int, float] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def num_better(self, value: float) -> int:
+        return len(self.values) - bisect.bisect_right(self.values, value)
+
+    def set(self, user_id: int, value: float) -> None:
+        self.remove(user_id)
+        bisect.insort(self.values, value)
+        self.by_user[user_id] = value
+
+    def remove(self, user_id: int) -> None:
+        value = self.by_user.pop(user_id, None)
+        if value is not None:
+            del self.values[bisect.bisect_left(self.values, value)]
+
+
+# {(map_md5, mode): placements, ...}, least recently used first
+_placements: OrderedDict[tuple[str, GameMode], MapPlacements] = OrderedDict()
+
+# {(map_md5, mode): load, ...}; concurrent misses share a single load.
+_loads_in_flight: dict[tuple[str, GameMode], asyncio.Task[MapPlacements]] = {}
+
+# indices changed while being loaded, which mustn't be cached.
+_changed_while_loading: set[tuple[str, GameMode]] = set()
+
+
+def _scoring_metric(mode: GameMode) -> str:
+    """The score attribute which leaderboards in a mode are ranked by."""
+    return "pp" if mode >= GameMode.RELAX_OSU else "score"
+
+
+async def _fetch_placements(map_md5: str, mode: GameMode) -> MapPlacements:
+    rows = await app.state.services.database.fetch_all(
+        f"SELECT s.userid, s.{_scoring_metric(mode)} AS value FROM scores s "
+        "INNER JOIN users u ON u.id = s.userid "
+        "WHERE s.map_md5 = :map_md5 AND s.mode = :mode "
+        "AND s.status = 2 AND u.priv & 1",
+        {"map_md5": map_md5, "mode": mode},
+    )
+
+    by_user = {row["userid"]: row["value"] for row in rows}
+    return MapPlacements(values=sorted(by_user.values()), by_user=by_user)
+
+
+async def _load(map_md5: str, mode: GameMode) -> MapPlacements:
+    key = (map_md5, mode)
+    placements = await _fetch_placements(map_md5, mode)
+
+    if key in _changed_while_loading:
+        _changed_while_loading.discard(key)
+    else:
+        _placements[key] = placements
+        while len(_placements) > PLACEMENTS_MAX_ENTRIES:
+            _placements.popitem(last=False)
+
+    return placements
+
+
+async def get_placement(map_md5: str, mode: GameMode, value: float) -> int:
+    """Get the leaderboard placement a score of `value` would have on a map."""
+    key = (map_md5, mode)
+    placements = _placements.get(key)
+
+    if placements is None or time.monotonic() - placements.loaded_at > PLACEMENTS_TTL:
+        task = _loads_in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(_load(map_md5, mode))
+            task.add_done_callback(lambda _: _loads_in_flight.pop(key, None))
+            _loads_in_flight[key] = task
+
+        # shield the shared load from cancellation of any one waiter
+        placements = await asyncio.shield(task)
+    else:
+        _placements.move_to_end(key)
+
+    return placements.num_better(value) + 1
+
+
+def submit_best_score(
+    map_md5: str,
+    mode: GameMode,
+    user_id: int,
+    value: float,
+) -> None:
+    """Record a user's new best score on a map; it must already be in sql."""
+    key = (map_md5, mode)
+    if key in _loads_in_flight:
+        _changed_while_loading.add(key)
+
+    placements = _placements.get(key)
+    if placements is not None:
+        placements.set(user_id, value)
+
+
+def remove_user(user_id: int) -> None:
+    """Remove a user's scores from all indices; e.g. on restriction."""
+    _changed_while_loading.update(_loads_in_flight)
+
+    for placements in _placements.values():
+        placements.remove(user_id)
+
+
+def invalidate_map(map_md5: str) -> None:
+    """Drop the indices of a map; e.g. when its scores are deleted."""
+    for mode in GameMode:
+        key = (map_md5, mode)
+        if key in _loads_in_flight:
+            _changed_while_loading.add(key)
+
+        _placements.pop(key, None)
+
+
+def clear() -> None:
+    """Drop every index; e.g. when a user's scores become listed again."""
+    _changed_while_loading.update(_loads_in_flight)
+    _placements.clear()
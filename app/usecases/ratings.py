@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+
+from app.repositories import ratings as ratings_repo
+
+# how many maps' rating aggregates to keep in memory at once.
+RATING_AGGREGATES_MAX_ENTRIES = 16384
+
+# {map_md5: (count, total), ...}, least recently used first
+_aggregates: OrderedDict[str, tuple[int, int]] = OrderedDict()
+
+# bumped on each new rating, so that aggregates fetched
+# before one are not cached after it has happened.
+_generation = 0
+
+
+async def get_average_rating(map_md5: str) -> float:
+    """Get the average of a map's ratings, or 0.0 if it has none."""
+    aggregate = _aggregates.get(map_md5)
+    if aggregate is None:
+        generation = _generation
+        rec = await ratings_repo.fetch_aggregate(map_md5)
+        aggregate = (rec["count"], rec["total"])
+
+        if generation == _generation:
+            _aggregates[map_md5] = aggregate
+            while len(_aggregates) > RATING_AGGREGATES_MAX_ENTRIES:
+                _aggregates.popitem(last=False)
+    else:
+        _aggregates.move_to_end(map_md5)
+
+    count, total = aggregate
+    return total / count if count else 0.0
+
+
+async def create(userid: int, map_md5: str, rating: int) -> None:
+    """Store a user's rating of a map, & add it to the map's aggregate."""
+    global _generation
+
+    await ratings_repo.create(userid=userid, map_md5=map_md5, rating=rating)
+    _generation += 1
+
+    aggregate = _aggregates.get(map_md5)
+    if aggregate is not None:
+        count, total = aggregate
+        _aggregates[map_md5] = (count + 1, total + rating)
@@ -191,7 +191,7 @@ def ensure_persistent_volumes_are_available() -> None:
     DATA_PATH.mkdir(exist_ok=True)
 
     # create /.data/... subdirectories
-    for sub_dir in ("avatars", "logs", "osu", "osr", "ss"):
+    for sub_dir in ("avatars", "geoloc", "logs", "osu", "osr", "ss"):
         subdir = DATA_PATH / sub_dir
         subdir.mkdir(exist_ok=True)
 
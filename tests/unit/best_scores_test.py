@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from app.constants.gamemodes import GameMode
+from app.usecases import best_scores as best_scores_usecases
+from app.usecases.best_scores import BestScores
+
+
+def naive_totals(pps: list[float], accs: list[float]) -> tuple[int, float]:
+    # the calculation score submission did before the index was introduced
+    weighted_acc = sum(acc * 0.95**i for i, acc in enumerate(accs))
+    bonus_acc = 100.0 / (20 * (1 - 0.95 ** len(accs)))
+    acc = (weighted_acc * bonus_acc) / 100
+
+    weighted_pp = sum(pp * 0.95**i for i, pp in enumerate(pps))
+    bonus_pp = 416.6667 * (1 - 0.9994 ** len(pps))
+    pp = round(weighted_pp + bonus_pp)
+
+    return pp, acc
+
+
+@pytest.fixture(autouse=True)
+def _empty_index() -> Iterator[None]:
+    best_scores_usecases._best_scores.clear()
+    yield
+    best_scores_usecases._best_scores.clear()
+
+
+@pytest.mark.parametrize(
+    ("pps", "accs"),
+    [
+        ([100.0], [98.5]),
+        ([727.0, 400.0, 400.0, 12.5], [100.0, 99.1, 97.0, 88.8]),
+        ([1000.0 - i for i in range(250)], [95.0 + (i % 5) for i in range(250)]),
+    ],
+)
+def test_calculate_totals_matches_naive(pps: list[float], accs: list[float]) -> None:
+    pp, acc = best_scores_usecases.calculate_totals(pps, accs)
+    expected_pp, expected_acc = naive_totals(pps, accs)
+
+    assert pp == expected_pp
+    assert math.isclose(acc, expected_acc)
+
+
+def test_calculate_totals_without_scores() -> None:
+    assert best_scores_usecases.calculate_totals([], []) == (0, 0.0)
+
+
+def test_best_scores_add_keeps_pp_descending() -> None:
+    best_scores = BestScores()
+    best_scores.add(1, 100.0, 95.0)
+    best_scores.add(2, 300.0, 99.0)
+    best_scores.add(3, 200.0, 97.0)
+    best_scores.add(4, 200.0, 96.0)  # after the equal score
+
+    assert best_scores.ids == [2, 3, 4, 1]
+    assert best_scores.pps == [300.0, 200.0, 200.0, 100.0]
+    assert best_scores.accs == [99.0, 97.0, 96.0, 95.0]
+
+
+def test_best_scores_remove() -> None:
+    best_scores = BestScores()
+    best_scores.add(1, 100.0, 95.0)
+    best_scores.add(2, 300.0, 99.0)
+
+    best_scores.remove(2)
+    best_scores.remove(3)  # not present
+
+    assert best_scores.ids == [1]
+    assert best_scores.pps == [100.0]
+    assert best_scores.accs == [95.0]
+
+
+# {(user_id, mode): [(score_id, pp, acc), ...], ...}
+ScoreRows = dict[tuple[int, GameMode], list[tuple[int, float, float]]]
+
+
+@pytest.fixture
+def score_rows(monkeypatch: pytest.MonkeyPatch) -> ScoreRows:
+    """The best scores in "sql", which indices are loaded from."""
+    score_rows: ScoreRows = {}
+
+    async def fetch_best_scores(user_id: int, mode: GameMode) -> BestScores:
+        best_scores = BestScores()
+        for score_id, pp, acc in score_rows.get((user_id, mode), []):
+            best_scores.add(score_id, pp, acc)
+
+        return best_scores
+
+    monkeypatch.setattr(best_scores_usecases, "_fetch_best_scores", fetch_best_scores)
+    return score_rows
+
+
+async def test_submit_best_score_loads_then_applies_in_place(
+    score_rows: ScoreRows,
+) -> None:
+    mode = GameMode.VANILLA_OSU
+    score_rows[(3, mode)] = [(1, 200.0, 98.0), (2, 100.0, 97.0)]
+
+    # the first submission loads the index (with the new score already in sql)
+    score_rows[(3, mode)].append((3, 150.0, 99.0))
+    totals = await best_scores_usecases.submit_best_score(3, mode, 3, 150.0, 99.0)
+    assert totals == naive_totals([200.0, 150.0, 100.0], [98.0, 99.0, 97.0])
+
+    # later submissions replace the previous best without refetching
+    totals = await best_scores_usecases.submit_best_score(
+        3,
+        mode,
+        4,
+        300.0,
+        100.0,
+        prev_best_id=2,
+    )
+    assert totals == naive_totals([300.0, 200.0, 150.0], [100.0, 98.0, 99.0])
+
+
+async def test_submit_best_score_reloads_after_ttl(score_rows: ScoreRows) -> None:
+    mode = GameMode.VANILLA_OSU
+    score_rows[(3, mode)] = [(1, 200.0, 98.0)]
+    await best_scores_usecases.submit_best_score(3, mode, 1, 200.0, 98.0)
+
+    best_scores_usecases._best_scores[(3, mode)].loaded_at = (
+        time.monotonic() - best_scores_usecases.BEST_SCORES_TTL - 1
+    )
+
+    # e.g. recalculated outside of the server
+    score_rows[(3, mode)] = [(1, 250.0, 98.0), (2, 10.0, 90.0)]
+    totals = await best_scores_usecases.submit_best_score(3, mode, 2, 10.0, 90.0)
+
+    assert totals == naive_totals([250.0, 10.0], [98.0, 90.0])
+
+
+async def test_submit_best_score_evicts_least_recently_used(
+    score_rows: ScoreRows,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(best_scores_usecases, "BEST_SCORES_MAX_ENTRIES", 2)
+    mode = GameMode.VANILLA_OSU
+
+    await best_scores_usecases.submit_best_score(1, mode, 1, 100.0, 99.0)
+    await best_scores_usecases.submit_best_score(2, mode, 2, 100.0, 99.0)
+    await best_scores_usecases.submit_best_score(1, mode, 3, 100.0, 99.0)
+    await best_scores_usecases.submit_best_score(3, mode, 4, 100.0, 99.0)
+
+    assert list(best_scores_usecases._best_scores) == [(1, mode), (3, mode)]
+
+
+async def test_invalidate(score_rows: ScoreRows) -> None:
+    await best_scores_usecases.submit_best_score(
+        3,
+        GameMode.VANILLA_OSU,
+        1,
+        100.0,
+        99.0,
+    )
+
+    best_scores_usecases.invalidate()
+
+    assert not best_scores_usecases._best_scores
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import pytest
+
+import app.packets
+from app.constants.gamemodes import GameMode
+from app.constants.privileges import Privileges
+from app.objects.collections import Players
+from app.objects.player import ModeData
+from app.objects.player import Player
+
+
+def make_player(
+    id: int,
+    name: str,
+    priv: Privileges = Privileges.UNRESTRICTED,
+) -> Player:
+    player = Player(
+        id=id,
+        name=name,
+        priv=priv,
+        pw_bcrypt=None,
+        token=f"token-{id}-{name}",
+    )
+    player.stats[GameMode.VANILLA_OSU] = ModeData(
+        tscore=0,
+        rscore=0,
+        pp=0,
+        acc=0.0,
+        plays=0,
+        playtime=0,
+        max_combo=0,
+        total_hits=0,
+        rank=0,
+        grades={},
+    )
+    return player
+
+
+@pytest.fixture
+def players() -> Players:
+    return Players()
+
+
+def test_change_username_keeps_audiences(players: Players) -> None:
+    staff = make_player(3, "cmyui", Privileges.UNRESTRICTED | Privileges.MODERATOR)
+    players.append(staff)
+
+    players.change_username(staff, "jacobian")
+
+    assert staff in players.staff
+    assert staff in players.unrestricted
+
+    # broadcast to unrestricted players, as e.g. logouts are
+    data = app.packets.logout(1)
+    for player in players.unrestricted:
+        player.enqueue(data)
+
+    assert staff.dequeue() == data
+
+
+def test_change_username_offline_player(players: Players) -> None:
+    player = make_player(3, "cmyui")
+
+    players.change_username(player, "jacobian")
+
+    assert player.name == "jacobian"
+    assert player not in players.unrestricted
+    assert players.get(name="jacobian") is None
+
+
+def test_snapshot_follows_restriction_status(players: Players) -> None:
+    player = make_player(3, "cmyui")
+    players.append(player)
+    assert player.presence_packet in players.snapshot.data
+
+    player.priv &= ~Privileges.UNRESTRICTED
+    players.snapshot.update(player)
+    assert len(players.snapshot) == 0
+    assert players.snapshot.data == b""
+
+    # unrestricted while online
+    player.priv |= Privileges.UNRESTRICTED
+    players.snapshot.update(player)
+    assert players.snapshot.data == player.presence_packet + player.stats_packet
+
+
+def test_snapshot_ignores_offline_players(players: Players) -> None:
+    player = make_player(3, "cmyui")
+
+    players.snapshot.update(player)
+
+    assert len(players.snapshot) == 0
+
+
+def test_get_by_token_id_and_name(players: Players) -> None:
+    player = make_player(3, "Cool Guy")
+    players.append(player)
+
+    assert players.get(token=player.token) is player
+    assert players.get(id=3) is player
+    assert players.get(name="cool_guy") is player
+    assert players.get(name="COOL GUY") is player
+    assert players.get() is None
+
+    assert players.ids == {3}
+
+
+def test_change_username_updates_indexes(players: Players) -> None:
+    player = make_player(3, "cmyui")
+    players.append(player)
+
+    players.change_username(player, "jacobian")
+
+    assert players.get(name="cmyui") is None
+    assert players.get(name="jacobian") is player
+    assert players.get(id=3) is player
+    assert players.get(token=player.token) is player
+
+
+def test_remove_clears_indexes(players: Players) -> None:
+    player = make_player(3, "cmyui")
+    players.append(player)
+
+    players.remove(player)
+
+    assert player not in players
+    assert players.get(token=player.token) is None
+    assert players.get(id=3) is None
+    assert players.get(name="cmyui") is None
+    assert players.ids == set()
+    assert player not in players.unrestricted
+
+
+def test_remove_after_rename_clears_indexes(players: Players) -> None:
+    player = make_player(3, "cmyui")
+    players.append(player)
+    player.name = "jacobian"  # e.g. renamed without going through `players`
+
+    players.remove(player)
+
+    assert players.get(name="cmyui") is None
+    assert players.get(name="jacobian") is None
+    assert players.get(id=3) is None
+
+
+def test_sessions_sharing_an_id(players: Players) -> None:
+    main = make_player(3, "cmyui")
+    tourney = make_player(3, "cmyui")
+    tourney.token = "token-3-cmyui-tourney"
+    players.append(main)
+    players.append(tourney)
+
+    # the first session added is preferred
+    assert players.get(id=3) is main
+    assert players.get(name="cmyui") is main
+    assert players.get(token=tourney.token) is tourney
+
+    players.remove(main)
+
+    assert players.get(id=3) is tourney
+    assert players.get(name="cmyui") is tourney
+    assert players.get(token=main.token) is None
+
+
+def test_double_append_is_ignored(players: Players) -> None:
+    player = make_player(3, "cmyui")
+    players.append(player)
+    players.append(player)
+
+    assert len(players) == 1
+
+    players.remove(player)
+    assert players.get(id=3) is None
+
+
+def test_update_privs_moves_audiences(players: Players) -> None:
+    player = make_player(3, "cmyui")
+    players.append(player)
+    assert player in players.unrestricted
+    assert player not in players.staff
+
+    player.priv = Privileges.MODERATOR
+    players.update_privs(player)
+
+    assert player in players.restricted
+    assert player not in players.unrestricted
+    assert player in players.staff
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+import app.state
+from app.constants.privileges import Privileges
+from app.objects.player import Player
+from app.repositories import users as users_repo
+from app.state.cache import CredentialCache
+
+
+@pytest.fixture
+def cache() -> CredentialCache:
+    return CredentialCache(max_entries=2, ttl=60)
+
+
+def test_get_after_set(cache: CredentialCache) -> None:
+    assert cache.get(b"bcrypt-a") is None
+
+    cache.set(b"bcrypt-a", b"md5-a")
+
+    assert cache.get(b"bcrypt-a") == b"md5-a"
+    assert cache.get(b"bcrypt-b") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.hit_rate == 1 / 3
+
+
+def test_hit_rate_without_lookups(cache: CredentialCache) -> None:
+    assert cache.hit_rate == 0.0
+
+
+def test_entries_expire() -> None:
+    cache = CredentialCache(max_entries=2, ttl=0)
+    cache.set(b"bcrypt-a", b"md5-a")
+
+    assert cache.get(b"bcrypt-a") is None
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache: CredentialCache) -> None:
+    cache.set(b"bcrypt-a", b"md5-a")
+    cache.set(b"bcrypt-b", b"md5-b")
+
+    cache.get(b"bcrypt-a")
+    cache.set(b"bcrypt-c", b"md5-c")
+
+    assert len(cache) == 2
+    assert cache.get(b"bcrypt-a") == b"md5-a"
+    assert cache.get(b"bcrypt-b") is None
+    assert cache.get(b"bcrypt-c") == b"md5-c"
+
+
+def test_nbytes(cache: CredentialCache) -> None:
+    cache.set(b"bcrypt-a", b"md5-a")
+    assert cache.nbytes == len(b"bcrypt-a") + len(b"md5-a")
+
+    # replaced, rather than counted twice
+    cache.set(b"bcrypt-a", b"md5-aa")
+    assert cache.nbytes == len(b"bcrypt-a") + len(b"md5-aa")
+
+    cache.set(b"bcrypt-b", b"md5-b")
+    cache.set(b"bcrypt-c", b"md5-c")  # evicts a
+    assert cache.nbytes == 2 * (len(b"bcrypt-b") + len(b"md5-b"))
+
+    cache.invalidate(b"bcrypt-b")
+    cache.invalidate(b"bcrypt-b")  # not present
+    assert cache.nbytes == len(b"bcrypt-c") + len(b"md5-c")
+
+
+@pytest.fixture
+def player(monkeypatch: pytest.MonkeyPatch) -> Player:
+    async def partial_update(id: int, **kwargs: Any) -> None:
+        return None
+
+    monkeypatch.setattr(users_repo, "partial_update", partial_update)
+    app.state.cache.bcrypt.set(b"bcrypt-a", b"md5-a")
+
+    return Player(
+        id=3,
+        name="cmyui",
+        priv=Privileges.UNRESTRICTED | Privileges.VERIFIED,
+        pw_bcrypt=b"bcrypt-a",
+        token="token-3-cmyui",
+    )
+
+
+async def test_remove_privs_invalidates_credentials(player: Player) -> None:
+    await player.remove_privs(Privileges.UNRESTRICTED)
+
+    assert app.state.cache.bcrypt.get(b"bcrypt-a") is None
+
+
+async def test_update_privs_invalidates_credentials(player: Player) -> None:
+    await player.update_privs(Privileges.VERIFIED)
+
+    assert app.state.cache.bcrypt.get(b"bcrypt-a") is None
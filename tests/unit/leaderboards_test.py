@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+import app.api.domains.osu
+from app.state.cache import LeaderboardCache
+from app.state.cache import RenderedLeaderboard
+
+KEY = (0, 1, None)  # (mode, leaderboard type, mods/country)
+
+
+def make_leaderboard(*user_ids: int) -> RenderedLeaderboard:
+    rows: list[dict[str, Any]] = [{"userid": user_id} for user_id in user_ids]
+    return RenderedLeaderboard(rows, b"")
+
+
+@pytest.fixture
+def cache() -> LeaderboardCache:
+    return LeaderboardCache(max_maps=2, ttl=60)
+
+
+def test_get_after_set(cache: LeaderboardCache) -> None:
+    leaderboard = make_leaderboard(3)
+    assert cache.get("a", KEY) is None
+
+    cache.set("a", KEY, leaderboard, cache.generation)
+
+    assert cache.get("a", KEY) is leaderboard
+    assert cache.get("a", (0, 2, None)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_set_is_dropped_after_invalidation(cache: LeaderboardCache) -> None:
+    generation = cache.generation  # (fetching from sql...)
+    cache.invalidate_map("a")
+
+    cache.set("a", KEY, make_leaderboard(3), generation)
+
+    assert cache.get("a", KEY) is None
+
+
+def test_entries_expire() -> None:
+    cache = LeaderboardCache(max_maps=2, ttl=0)
+    cache.set("a", KEY, make_leaderboard(3), cache.generation)
+
+    assert cache.get("a", KEY) is None
+
+
+def test_least_recently_used_maps_are_evicted(cache: LeaderboardCache) -> None:
+    for map_md5 in ("a", "b"):
+        cache.set(map_md5, KEY, make_leaderboard(3), cache.generation)
+
+    cache.get("a", KEY)
+    cache.set("c", KEY, make_leaderboard(3), cache.generation)
+
+    assert len(cache) == 2
+    assert cache.get("a", KEY) is not None
+    assert cache.get("b", KEY) is None
+    assert cache.get("c", KEY) is not None
+
+
+def test_invalidate_map(cache: LeaderboardCache) -> None:
+    cache.set("a", KEY, make_leaderboard(3), cache.generation)
+    cache.set("a", (0, 2, None), make_leaderboard(3), cache.generation)
+    cache.set("b", KEY, make_leaderboard(3), cache.generation)
+
+    cache.invalidate_map("a")
+
+    assert cache.get("a", KEY) is None
+    assert cache.get("a", (0, 2, None)) is None
+    assert cache.get("b", KEY) is not None
+
+
+def test_invalidate_user(cache: LeaderboardCache) -> None:
+    cache.set("a", KEY, make_leaderboard(3, 4), cache.generation)
+    cache.set("b", KEY, make_leaderboard(4), cache.generation)
+    generation = cache.generation
+
+    cache.invalidate_user(3)
+
+    assert cache.get("a", KEY) is None
+    assert cache.get("b", KEY) is not None
+    assert cache.generation != generation
+
+
+def test_clear(cache: LeaderboardCache) -> None:
+    generation = cache.generation
+    cache.set("a", KEY, make_leaderboard(3), generation)
+
+    cache.clear()
+
+    assert len(cache) == 0
+    cache.set("a", KEY, make_leaderboard(3), generation)
+    assert cache.get("a", KEY) is None
+
+
+def make_score_row(id: int, name: str, score: float) -> dict[str, Any]:
+    return {
+        "id": id,
+        "_score": score,
+        "max_combo": 1000,
+        "n50": 0,
+        "n100": 3,
+        "n300": 997,
+        "nmiss": 0,
+        "nkatu": 2,
+        "ngeki": 200,
+        "perfect": 1,
+        "mods": 72,
+        "time": 1700000000,
+        "userid": id + 100,
+        "name": name,
+    }
+
+
+def test_render_score_listing() -> None:
+    rows = [make_score_row(1, "[ABC] cmyui", 727.49), make_score_row(2, "jacobian", 3)]
+
+    assert app.api.domains.osu.render_score_listing(rows) == (
+        b"1|[ABC] cmyui|727|1000|0|3|997|0|2|200|1|72|101|1|1700000000|1\n"
+        b"2|jacobian|3|1000|0|3|997|0|2|200|1|72|102|2|1700000000|1"
+    )
+    assert app.api.domains.osu.render_score_listing([]) == b""
+
+
+def test_rendered_listing_splices_like_formatted_lines() -> None:
+    rows = [make_score_row(1, "cmyui", 727.0), make_score_row(2, "jacobian", 3.0)]
+    leaderboard = RenderedLeaderboard(
+        rows,
+        app.api.domains.osu.render_score_listing(rows),
+    )
+    response_lines = ["2|false|1|2|2|0|", "0\nsome map\n10.0", ""]
+
+    # the response, as it was built before listings were pre-rendered
+    expected = "\n".join(
+        response_lines
+        + [
+            app.api.domains.osu.SCORE_LISTING_FMTSTR.format(
+                **row,
+                score=int(round(row["_score"])),
+                has_replay="1",
+                rank=idx + 1,
+            )
+            for idx, row in enumerate(rows)
+        ],
+    ).encode()
+
+    assert b"\n".join(("\n".join(response_lines).encode(), leaderboard.listing)) == (
+        expected
+    )
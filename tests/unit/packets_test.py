@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import struct
+from collections.abc import Callable
+from typing import Any
+
 import pytest
 
 import app.packets
+from app.objects.player import Player
 
 
 @pytest.mark.parametrize(
@@ -667,3 +672,216 @@ def test_write_match_abort():
 )
 def test_write_switch_tournament_server(test_input, expected):
     assert app.packets.switch_tournament_server(test_input) == expected
+
+
+class _ReadMessagePacket(app.packets.BasePacket):
+    def __init__(self, reader: app.packets.BanchoPacketReader) -> None:
+        self.msg = reader.read_message()
+
+    async def handle(self, player: Player) -> None: ...
+
+
+class _ReadI32ListPacket(app.packets.BasePacket):
+    def __init__(self, reader: app.packets.BanchoPacketReader) -> None:
+        self.user_ids = reader.read_i32_list_i16l()
+
+    async def handle(self, player: Player) -> None: ...
+
+
+@pytest.mark.parametrize(
+    ("test_input", "expected"),
+    [
+        (
+            # unhandled ping, followed by a public message
+            b"\x04\x00\x00\x00\x00\x00\x00"
+            b"\x01\x00\x00\x1a\x00\x00\x00\x00\x0b\x0dwoah woah \xe2\x9c\x93\x0b\x04#osu\x00\x00\x00\x00",
+            [app.packets.Message("", "woah woah ✓", "#osu", 0)],
+        ),
+        (
+            b"\x01\x00\x00\x07\x00\x00\x00\x00\x00\x00\x07\x00\x00\x00"
+            b"\x01\x00\x00\x07\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00",
+            [app.packets.Message("", "", "", 7), app.packets.Message("", "", "", 3)],
+        ),
+        (b"", []),
+    ],
+)
+def test_read_message(test_input, expected):
+    packet_map: dict[app.packets.ClientPackets, type[app.packets.BasePacket]] = {
+        app.packets.ClientPackets.SEND_PUBLIC_MESSAGE: _ReadMessagePacket,
+    }
+    with memoryview(test_input) as body_view:
+        reader = app.packets.BanchoPacketReader(body_view, packet_map)
+        messages = []
+        for packet in reader:
+            assert isinstance(packet, _ReadMessagePacket)
+            messages.append(packet.msg)
+
+        assert messages == expected
+        assert reader.offset == len(test_input)
+
+
+@pytest.mark.parametrize(
+    ("test_input", "expected"),
+    [
+        (
+            b"U\x00\x00\x0a\x00\x00\x00\x02\x00\x03\x00\x00\x00\xe9\x03\x00\x00",
+            (3, 1001),
+        ),
+        (b"U\x00\x00\x02\x00\x00\x00\x00\x00", ()),
+    ],
+)
+def test_read_i32_list(test_input, expected):
+    packet_map: dict[app.packets.ClientPackets, type[app.packets.BasePacket]] = {
+        app.packets.ClientPackets.USER_STATS_REQUEST: _ReadI32ListPacket,
+    }
+    with memoryview(test_input) as body_view:
+        (packet,) = app.packets.BanchoPacketReader(body_view, packet_map)
+        assert isinstance(packet, _ReadI32ListPacket)
+        assert packet.user_ids == expected
+
+
+# the generic writer which the compiled encoders replaced,
+# as a reference for the bytes they're expected to produce.
+def _reference_write_string(s: str) -> bytes:
+    if not s:
+        return b"\x00"
+
+    encoded = s.encode()
+    return b"\x0b" + app.packets.write_uleb128(len(encoded)) + encoded
+
+
+def _reference_write_i32_list(l: list[int]) -> bytes:
+    return struct.pack(f"<h{len(l)}i", len(l), *l)
+
+
+_REFERENCE_WRITERS: dict[app.packets.osuTypes, Callable[[Any], bytes]] = {
+    app.packets.osuTypes.i8: struct.Struct("<b").pack,
+    app.packets.osuTypes.u8: struct.Struct("<B").pack,
+    app.packets.osuTypes.i16: struct.Struct("<h").pack,
+    app.packets.osuTypes.u16: struct.Struct("<H").pack,
+    app.packets.osuTypes.i32: struct.Struct("<i").pack,
+    app.packets.osuTypes.u32: struct.Struct("<I").pack,
+    app.packets.osuTypes.f32: struct.Struct("<f").pack,
+    app.packets.osuTypes.i64: struct.Struct("<q").pack,
+    app.packets.osuTypes.u64: struct.Struct("<Q").pack,
+    app.packets.osuTypes.f64: struct.Struct("<d").pack,
+    app.packets.osuTypes.string: _reference_write_string,
+    app.packets.osuTypes.i32_list: _reference_write_i32_list,
+    app.packets.osuTypes.scoreframe: app.packets.write_scoreframe,
+    app.packets.osuTypes.raw: bytes,
+}
+
+
+def _reference_write(packid: int, *args: tuple[Any, app.packets.osuTypes]) -> bytes:
+    ret = bytearray(struct.pack("<Hx", packid))
+
+    for p_args, p_type in args:
+        ret += _REFERENCE_WRITERS[p_type](p_args)
+
+    ret[3:3] = struct.pack("<I", len(ret) - 3)
+    return bytes(ret)
+
+
+_ENCODER_TEST_SCOREFRAME = app.packets.ScoreFrame(
+    time=1234,
+    id=3,
+    num300=500,
+    num100=20,
+    num50=1,
+    num_geki=80,
+    num_katu=10,
+    num_miss=2,
+    total_score=12_345_678,
+    max_combo=600,
+    current_combo=300,
+    perfect=False,
+    current_hp=200,
+    tag_byte=0,
+    score_v2=False,
+)
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        # entirely fixed-size
+        [(7, app.packets.osuTypes.i32)],
+        [
+            (-1, app.packets.osuTypes.i8),
+            (255, app.packets.osuTypes.u8),
+            (-2, app.packets.osuTypes.i16),
+            (65535, app.packets.osuTypes.u16),
+            (2**32 - 1, app.packets.osuTypes.u32),
+            (0.5, app.packets.osuTypes.f32),
+            (-(2**63), app.packets.osuTypes.i64),
+            (2**64 - 1, app.packets.osuTypes.u64),
+            (1 / 3, app.packets.osuTypes.f64),
+        ],
+        # variable-size only
+        [("", app.packets.osuTypes.string)],
+        [("a" * 127, app.packets.osuTypes.string)],
+        [("a" * 128, app.packets.osuTypes.string)],  # 2-byte uleb128 length
+        [("ｃｍｙｕｉ " * 100, app.packets.osuTypes.string)],
+        [([], app.packets.osuTypes.i32_list)],
+        [([3, -1, 2_147_483_647], app.packets.osuTypes.i32_list)],
+        [(b"", app.packets.osuTypes.raw)],
+        [(b"\x00\x01\x02", app.packets.osuTypes.raw)],
+        [(_ENCODER_TEST_SCOREFRAME, app.packets.osuTypes.scoreframe)],
+        # (formerly osuTypes.message & osuTypes.channel)
+        [
+            ("cmyui", app.packets.osuTypes.string),
+            ("woah woah crazy!!", app.packets.osuTypes.string),
+            ("#osu", app.packets.osuTypes.string),
+            (3, app.packets.osuTypes.i32),
+        ],
+        [
+            ("#lobby", app.packets.osuTypes.string),
+            ("", app.packets.osuTypes.string),
+            (12, app.packets.osuTypes.u16),
+        ],
+        # fixed-size runs between & after variable-size fields
+        [
+            (1001, app.packets.osuTypes.i32),
+            (4, app.packets.osuTypes.u8),
+            ("cmyui", app.packets.osuTypes.string),
+            (24, app.packets.osuTypes.u8),
+            (2, app.packets.osuTypes.u8),
+            (1.5, app.packets.osuTypes.f32),
+            ("", app.packets.osuTypes.string),
+            (9, app.packets.osuTypes.i64),
+            ([1, 2], app.packets.osuTypes.i32_list),
+            (b"\xff", app.packets.osuTypes.raw),
+        ],
+    ],
+)
+def test_compiled_encoders_match_generic_writer(fields):
+    args = [arg for arg, _ in fields]
+    layout = [p_type for _, p_type in fields]
+
+    packid = app.packets.ServerPackets.USER_STATS
+    encode = app.packets.compile_packet(packid, *layout)
+    assert encode(*args) == _reference_write(packid, *fields)
+
+
+def test_packets_match_generic_writer():
+    assert app.packets.send_message("cmyui", "hi", "#osu", 3) == _reference_write(
+        app.packets.ServerPackets.SEND_MESSAGE,
+        ("cmyui", app.packets.osuTypes.string),
+        ("hi", app.packets.osuTypes.string),
+        ("#osu", app.packets.osuTypes.string),
+        (3, app.packets.osuTypes.i32),
+    )
+    assert app.packets.channel_info("#osu", "general", 5) == _reference_write(
+        app.packets.ServerPackets.CHANNEL_INFO,
+        ("#osu", app.packets.osuTypes.string),
+        ("general", app.packets.osuTypes.string),
+        (5, app.packets.osuTypes.u16),
+    )
+    assert app.packets.friends_list([1, 2, 3]) == _reference_write(
+        app.packets.ServerPackets.FRIENDS_LIST,
+        ([1, 2, 3], app.packets.osuTypes.i32_list),
+    )
+    assert app.packets.silence_end(-60) == _reference_write(
+        app.packets.ServerPackets.SILENCE_END,
+        (-60, app.packets.osuTypes.i32),
+    )
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from app.constants.gamemodes import GameMode
+from app.usecases import placements as placements_usecases
+from app.usecases.placements import MapPlacements
+
+MODE = GameMode.VANILLA_OSU
+
+
+def test_num_better() -> None:
+    placements = MapPlacements()
+    for user_id, value in ((1, 300.0), (2, 100.0), (3, 200.0), (4, 200.0)):
+        placements.set(user_id, value)
+
+    assert placements.values == [100.0, 200.0, 200.0, 300.0]
+    assert placements.num_better(400.0) == 0
+    assert placements.num_better(300.0) == 0  # ties share a placement
+    assert placements.num_better(200.0) == 1
+    assert placements.num_better(150.0) == 3
+    assert placements.num_better(0.0) == 4
+
+
+def test_set_replaces_a_users_value() -> None:
+    placements = MapPlacements()
+    placements.set(1, 100.0)
+    placements.set(2, 100.0)
+
+    placements.set(1, 300.0)
+
+    assert placements.values == [100.0, 300.0]
+    assert placements.by_user == {1: 300.0, 2: 100.0}
+
+
+def test_remove() -> None:
+    placements = MapPlacements()
+    placements.set(1, 100.0)
+    placements.set(2, 100.0)
+
+    placements.remove(1)
+    placements.remove(3)  # not present
+
+    assert placements.values == [100.0]
+    assert placements.by_user == {2: 100.0}
+
+
+# {(map_md5, mode): {user_id: value, ...}, ...}
+PlacementRows = dict[tuple[str, GameMode], dict[int, float]]
+
+
+@pytest.fixture
+def rows() -> PlacementRows:
+    """The best scores in "sql", which indices are loaded from."""
+    return {}
+
+
+@pytest.fixture
+def fetch_gate() -> asyncio.Event:
+    """Loads wait on this after querying; clear it to hold them in flight."""
+    fetch_gate = asyncio.Event()
+    fetch_gate.set()
+    return fetch_gate
+
+
+@pytest.fixture(autouse=True)
+def fetched(
+    monkeypatch: pytest.MonkeyPatch,
+    rows: PlacementRows,
+    fetch_gate: asyncio.Event,
+) -> Iterator[list[tuple[str, GameMode]]]:
+    """The (map, mode) of each load which has queried "sql"."""
+    fetched: list[tuple[str, GameMode]] = []
+
+    async def fetch_placements(map_md5: str, mode: GameMode) -> MapPlacements:
+        fetched.append((map_md5, mode))
+        by_user = dict(rows.get((map_md5, mode), {}))
+        await fetch_gate.wait()
+
+        return MapPlacements(values=sorted(by_user.values()), by_user=by_user)
+
+    monkeypatch.setattr(placements_usecases, "_fetch_placements", fetch_placements)
+
+    yield fetched
+
+    placements_usecases._placements.clear()
+    placements_usecases._loads_in_flight.clear()
+    placements_usecases._changed_while_loading.clear()
+
+
+async def test_get_placement_loads_once(
+    rows: PlacementRows,
+    fetched: list[tuple[str, GameMode]],
+) -> None:
+    rows[("a", MODE)] = {1: 300.0, 2: 100.0}
+
+    assert await placements_usecases.get_placement("a", MODE, 200.0) == 2
+    assert await placements_usecases.get_placement("a", MODE, 50.0) == 3
+    assert fetched == [("a", MODE)]
+
+
+async def test_concurrent_misses_share_a_load(
+    rows: PlacementRows,
+    fetch_gate: asyncio.Event,
+    fetched: list[tuple[str, GameMode]],
+) -> None:
+    rows[("a", MODE)] = {1: 300.0}
+    fetch_gate.clear()
+
+    waiters = [
+        asyncio.create_task(placements_usecases.get_placement("a", MODE, 100.0))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    fetch_gate.set()
+
+    assert await asyncio.gather(*waiters) == [2, 2, 2]
+    assert fetched == [("a", MODE)]
+
+
+async def test_get_placement_reloads_after_ttl(
+    rows: PlacementRows,
+    fetched: list[tuple[str, GameMode]],
+) -> None:
+    rows[("a", MODE)] = {1: 300.0}
+    await placements_usecases.get_placement("a", MODE, 100.0)
+
+    placements_usecases._placements[("a", MODE)].loaded_at = (
+        time.monotonic() - placements_usecases.PLACEMENTS_TTL - 1
+    )
+    rows[("a", MODE)] = {1: 300.0, 2: 200.0}
+
+    assert await placements_usecases.get_placement("a", MODE, 100.0) == 3
+    assert len(fetched) == 2
+
+
+async def test_submit_best_score_updates_loaded_index(
+    fetched: list[tuple[str, GameMode]],
+) -> None:
+    await placements_usecases.get_placement("a", MODE, 100.0)
+
+    placements_usecases.submit_best_score("a", MODE, 1, 300.0)
+
+    assert await placements_usecases.get_placement("a", MODE, 100.0) == 2
+    assert len(fetched) == 1
+
+
+async def test_changes_while_loading_are_not_cached(
+    rows: PlacementRows,
+    fetch_gate: asyncio.Event,
+    fetched: list[tuple[str, GameMode]],
+) -> None:
+    fetch_gate.clear()
+
+    waiter = asyncio.create_task(placements_usecases.get_placement("a", MODE, 100.0))
+    await asyncio.sleep(0)
+
+    # a new best score lands after the load's query ran
+    rows[("a", MODE)] = {1: 300.0}
+    placements_usecases.submit_best_score("a", MODE, 1, 300.0)
+    fetch_gate.set()
+    await waiter
+
+    # the (stale) load was served, but not cached
+    assert ("a", MODE) not in placements_usecases._placements
+    assert ("a", MODE) not in placements_usecases._changed_while_loading
+
+    assert await placements_usecases.get_placement("a", MODE, 100.0) == 2
+    assert len(fetched) == 2
+
+
+async def test_remove_user(rows: PlacementRows) -> None:
+    rows[("a", MODE)] = {1: 300.0}
+    rows[("b", MODE)] = {1: 300.0, 2: 200.0}
+    await placements_usecases.get_placement("a", MODE, 100.0)
+    await placements_usecases.get_placement("b", MODE, 100.0)
+
+    placements_usecases.remove_user(1)
+
+    assert await placements_usecases.get_placement("a", MODE, 100.0) == 1
+    assert await placements_usecases.get_placement("b", MODE, 100.0) == 2
+
+
+async def test_invalidate_map_and_clear() -> None:
+    await placements_usecases.get_placement("a", MODE, 100.0)
+    await placements_usecases.get_placement("b", MODE, 100.0)
+
+    placements_usecases.invalidate_map("a")
+    assert list(placements_usecases._placements) == [("b", MODE)]
+
+    placements_usecases.clear()
+    assert not placements_usecases._placements
+
+
+async def test_least_recently_used_maps_are_evicted(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(placements_usecases, "PLACEMENTS_MAX_ENTRIES", 2)
+
+    for map_md5 in ("a", "b", "a", "c"):
+        await placements_usecases.get_placement(map_md5, MODE, 100.0)
+
+    assert list(placements_usecases._placements) == [("a", MODE), ("c", MODE)]
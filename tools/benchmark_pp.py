@@ -0,0 +1,76 @@
+#!/usr/bin/env python3.11
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections.abc import Sequence
+
+# resolve file arguments before we change directories
+INVOCATION_DIR = os.getcwd()
+
+sys.path.insert(0, os.path.abspath(os.pardir))
+os.chdir(os.path.abspath(os.pardir))
+
+try:
+    import app.usecases.performance
+    from app.usecases.performance import ScoreParams
+except ModuleNotFoundError:
+    print("\x1b[;91mMust run from tools/ directory\x1b[m")
+    raise
+
+
+def time_submissions(osu_file_path: str, beatmap_md5: str | None, n: int) -> float:
+    """Time `n` submission-like calculations, returning the mean in seconds."""
+    started_at = time.perf_counter()
+
+    for i in range(n):
+        # vary the hit counts, as different submissions would
+        score = ScoreParams(mode=0, mods=0, combo=None, nmiss=i % 10)
+        app.usecases.performance.calculate_performances(
+            osu_file_path,
+            [score],
+            beatmap_md5,
+        )
+
+    return (time.perf_counter() - started_at) / n
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark pp calculation with & without the beatmap caches",
+    )
+    parser.add_argument("osu_file", help="Path to an osu!std .osu file")
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        help="The number of calculations to time",
+        type=int,
+        default=50,
+    )
+    args = parser.parse_args(argv)
+
+    osu_file_path = os.path.join(INVOCATION_DIR, args.osu_file)
+
+    uncached = time_submissions(osu_file_path, None, args.iterations)
+
+    # the md5 only serves as a cache key; prime the caches first
+    app.usecases.performance.calculate_performances(
+        osu_file_path,
+        [ScoreParams(mode=0)],
+        "benchmark",
+    )
+    cached = time_submissions(osu_file_path, "benchmark", args.iterations)
+
+    print(f"uncached: {uncached * 1000:.2f}ms per submission")
+    print(f"cached:   {cached * 1000:.2f}ms per submission")
+    print(f"saving:   {(uncached - cached) * 1000:.2f}ms ({1 - cached / uncached:.1%})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
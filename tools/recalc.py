@@ -3,14 +3,17 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import functools
+import itertools
+import json
 import math
+import multiprocessing
 import os
 import sys
-from collections.abc import Awaitable
 from collections.abc import Iterator
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from dataclasses import field
 from pathlib import Path
 from typing import Any
 from typing import TypeVar
@@ -18,6 +21,7 @@ from typing import TypeVar
 import databases
 from akatsuki_pp_py import Beatmap
 from akatsuki_pp_py import Calculator
+from akatsuki_pp_py import DifficultyAttributes
 from redis import asyncio as aioredis
 
 sys.path.insert(0, os.path.abspath(os.pardir))
@@ -30,6 +34,8 @@ try:
     from app.constants.mods import Mods
     from app.constants.privileges import Privileges
     from app.objects.beatmap import ensure_osu_file_is_available
+    from app.usecases import best_scores as best_scores_usecases
+    from app.usecases.performance import DIFFICULTY_MODS
 except ModuleNotFoundError:
     print("\x1b[;91mMust run from tools/ directory\x1b[m")
     raise
@@ -39,13 +45,29 @@ T = TypeVar("T")
 
 DEBUG = False
 BEATMAPS_PATH = Path.cwd() / ".data/osu"
+CHECKPOINT_PATH = Path.cwd() / ".data/recalc_checkpoint.json"
+
+# values are only written if they changed by more than the
+# precision they're stored with (scores.pp & stats.acc are 3dp)
+PP_TOLERANCE = 0.0005
+ACC_TOLERANCE = 0.0005
+
+# how many users' best scores are fetched & written at once
+USERS_PAGE_SIZE = 1000
 
 
 @dataclass
 class Context:
     database: databases.Database
     redis: aioredis.Redis
-    beatmaps: dict[int, Beatmap] = field(default_factory=dict)
+    executor: ProcessPoolExecutor
+    workers: int
+    batch_size: int
+
+    scores_changed: int = 0
+    scores_skipped: int = 0
+    users_changed: int = 0
+    users_skipped: int = 0
 
 
 def divide_chunks(values: list[T], n: int) -> Iterator[list[T]]:
@@ -53,165 +75,293 @@ def divide_chunks(values: list[T], n: int) -> Iterator[list[T]]:
         yield values[i : i + n]
 
 
-async def recalculate_score(
-    score: dict[str, Any],
-    beatmap_path: Path,
-    ctx: Context,
-) -> None:
-    beatmap = ctx.beatmaps.get(score["map_id"])
-    if beatmap is None:
-        beatmap = Beatmap(path=str(beatmap_path))
-        ctx.beatmaps[score["map_id"]] = beatmap
-
-    calculator = Calculator(
-        mode=GameMode(score["mode"]).as_vanilla,
-        mods=score["mods"],
-        combo=score["max_combo"],
-        n_geki=score["ngeki"],  # Mania 320s
-        n300=score["n300"],
-        n_katu=score["nkatu"],  # Mania 200s, Catch tiny droplets
-        n100=score["n100"],
-        n50=score["n50"],
-        n_misses=score["nmiss"],
-    )
-    attrs = calculator.performance(beatmap)
+@functools.lru_cache(maxsize=64)
+def load_beatmap(beatmap_path: str, beatmap_md5: str) -> Beatmap:
+    """Parse a map, re-using recent parses; maps recur across batches."""
+    return Beatmap(path=beatmap_path)
 
-    new_pp: float = attrs.pp
-    if math.isnan(new_pp) or math.isinf(new_pp):
-        new_pp = 0.0
 
-    new_pp = min(new_pp, 9999.999)
+def recalculate_map_scores(
+    beatmap_path: str,
+    scores: list[dict[str, Any]],
+) -> tuple[list[tuple[int, float]], int]:
+    """\
+    Recalculate the pp of scores on a single map; run in a worker process.
 
-    await ctx.database.execute(
-        "UPDATE scores SET pp = :new_pp WHERE id = :id",
-        {"new_pp": new_pp, "id": score["id"]},
-    )
+    Returns the scores whose pp changed, and the number which didn't.
+    """
+    beatmap = load_beatmap(beatmap_path, scores[0]["map_md5"])
 
-    if DEBUG:
-        print(
-            f"Recalculated score ID {score['id']} ({score['pp']:.3f}pp -> {new_pp:.3f}pp)",
-        )
+    # scores sharing a mode & mods share the map's difficulty
+    difficulties: dict[tuple[int, int], DifficultyAttributes] = {}
 
+    changed: list[tuple[int, float]] = []
+    skipped = 0
 
-async def process_score_chunk(
-    chunk: list[dict[str, Any]],
-    ctx: Context,
-) -> None:
-    tasks: list[Awaitable[None]] = []
-    for score in chunk:
-        osu_file_available = await ensure_osu_file_is_available(
-            score["map_id"],
-            expected_md5=score["map_md5"],
+    for score in scores:
+        mode_vn = GameMode(score["mode"]).as_vanilla
+
+        calculator = Calculator(
+            mode=mode_vn,
+            mods=score["mods"],
+            combo=score["max_combo"],
+            n_geki=score["ngeki"],  # Mania 320s
+            n300=score["n300"],
+            n_katu=score["nkatu"],  # Mania 200s, Catch tiny droplets
+            n100=score["n100"],
+            n50=score["n50"],
+            n_misses=score["nmiss"],
         )
-        if osu_file_available:
-            tasks.append(
-                recalculate_score(
-                    score,
-                    BEATMAPS_PATH / f"{score['map_id']}.osu",
-                    ctx,
-                ),
+
+        difficulty_key = (mode_vn, score["mods"] & DIFFICULTY_MODS)
+        difficulty = difficulties.get(difficulty_key)
+        if difficulty is None:
+            difficulty = calculator.difficulty(beatmap)
+            difficulties[difficulty_key] = difficulty
+
+        calculator.set_difficulty(difficulty)
+        attrs = calculator.performance(beatmap)
+
+        new_pp: float = attrs.pp
+        if math.isnan(new_pp) or math.isinf(new_pp):
+            new_pp = 0.0
+
+        new_pp = min(new_pp, 9999.999)
+
+        if abs(new_pp - score["pp"]) < PP_TOLERANCE:
+            skipped += 1
+            continue
+
+        changed.append((score["id"], new_pp))
+
+        if DEBUG:
+            print(
+                f"Recalculated score ID {score['id']} ({score['pp']:.3f}pp -> {new_pp:.3f}pp)",
             )
 
-    await asyncio.gather(*tasks)
+    return changed, skipped
+
+
+async def update_scores_pp(results: list[tuple[int, float]], ctx: Context) -> None:
+    """Write recalculated pp values, many scores per query."""
+    for chunk in divide_chunks(results, 1000):
+        params: dict[str, Any] = {}
+        for i, (score_id, new_pp) in enumerate(chunk):
+            params[f"id_{i}"] = score_id
+            params[f"pp_{i}"] = new_pp
 
+        cases = " ".join(f"WHEN :id_{i} THEN :pp_{i}" for i in range(len(chunk)))
+        ids = ", ".join(f":id_{i}" for i in range(len(chunk)))
 
-async def recalculate_user(
-    id: int,
+        await ctx.database.execute(
+            f"UPDATE scores SET pp = CASE id {cases} END WHERE id IN ({ids})",
+            params,
+        )
+
+
+async def update_stats(
+    results: list[tuple[int, int, float]],
     game_mode: GameMode,
     ctx: Context,
 ) -> None:
-    best_scores = await ctx.database.fetch_all(
-        "SELECT s.pp, s.acc FROM scores s "
+    """Write recalculated user totals, many users per query."""
+    for chunk in divide_chunks(results, 1000):
+        params: dict[str, Any] = {"mode": game_mode}
+        for i, (user_id, pp, acc) in enumerate(chunk):
+            params[f"id_{i}"] = user_id
+            params[f"pp_{i}"] = pp
+            params[f"acc_{i}"] = acc
+
+        pp_cases = " ".join(f"WHEN :id_{i} THEN :pp_{i}" for i in range(len(chunk)))
+        acc_cases = " ".join(f"WHEN :id_{i} THEN :acc_{i}" for i in range(len(chunk)))
+        ids = ", ".join(f":id_{i}" for i in range(len(chunk)))
+
+        await ctx.database.execute(
+            f"UPDATE stats SET pp = CASE id {pp_cases} END, acc = CASE id {acc_cases} END "
+            f"WHERE mode = :mode AND id IN ({ids})",
+            params,
+        )
+
+
+async def fetch_best_scores(
+    user_ids: list[int],
+    game_mode: GameMode,
+    ctx: Context,
+) -> dict[int, tuple[list[float], list[float]]]:
+    """Fetch a page of users' best ranked score pps & accs, ordered by pp."""
+    best_scores: dict[int, tuple[list[float], list[float]]] = {}
+
+    for row in await ctx.database.fetch_all(
+        "SELECT s.userid, s.pp, s.acc FROM scores s "
         "INNER JOIN maps m ON s.map_md5 = m.md5 "
-        "WHERE s.userid = :user_id AND s.mode = :mode "
+        "WHERE s.mode = :mode AND s.userid IN :user_ids "
         "AND s.status = 2 AND m.status IN (2, 3) "  # ranked, approved
-        "ORDER BY s.pp DESC",
-        {"user_id": id, "mode": game_mode},
-    )
+        "ORDER BY s.userid, s.pp DESC",
+        {"mode": game_mode, "user_ids": user_ids},
+    ):
+        pps, accs = best_scores.setdefault(row["userid"], ([], []))
+        pps.append(row["pp"])
+        accs.append(row["acc"])
 
-    total_scores = len(best_scores)
-    if not total_scores:
-        return
+    return best_scores
 
-    # calculate new total weighted accuracy
-    weighted_acc = sum(row["acc"] * 0.95**i for i, row in enumerate(best_scores))
-    bonus_acc = 100.0 / (20 * (1 - 0.95**total_scores))
-    acc = (weighted_acc * bonus_acc) / 100
 
-    # calculate new total weighted pp
-    weighted_pp = sum(row["pp"] * 0.95**i for i, row in enumerate(best_scores))
-    bonus_pp = 416.6667 * (1 - 0.9994**total_scores)
-    pp = round(weighted_pp + bonus_pp)
+async def recalculate_mode_users(mode: GameMode, ctx: Context) -> None:
+    users = {
+        row["id"]: row
+        for row in await ctx.database.fetch_all(
+            "SELECT u.id, u.country, u.priv, s.pp, s.acc FROM users u "
+            "INNER JOIN stats s ON s.id = u.id AND s.mode = :mode",
+            {"mode": mode},
+        )
+    }
 
-    await ctx.database.execute(
-        "UPDATE stats SET pp = :pp, acc = :acc WHERE id = :id AND mode = :mode",
-        {"pp": pp, "acc": acc, "id": id, "mode": game_mode},
-    )
+    # users are processed in pages of ids, with each page's
+    # writes made before the next page's scores are fetched.
+    for user_ids in divide_chunks(sorted(users), USERS_PAGE_SIZE):
+        best_scores = await fetch_best_scores(user_ids, mode, ctx)
 
-    user_info = await ctx.database.fetch_one(
-        "SELECT country, priv FROM users WHERE id = :id",
-        {"id": id},
-    )
-    if user_info is None:
-        raise Exception(f"Unknown user ID {id}?")
+        changed: list[tuple[int, int, float]] = []
+        leaderboards: dict[str, dict[str, int]] = {}
 
-    if user_info["priv"] & Privileges.UNRESTRICTED:
-        await ctx.redis.zadd(
-            f"bancho:leaderboard:{game_mode.value}",
-            {str(id): pp},
-        )
+        for user_id, (pps, accs) in best_scores.items():
+            user = users[user_id]
+            pp, acc = best_scores_usecases.calculate_totals(pps, accs)
 
-        await ctx.redis.zadd(
-            f"bancho:leaderboard:{game_mode.value}:{user_info['country']}",
-            {str(id): pp},
-        )
+            if pp != user["pp"] or abs(acc - user["acc"]) >= ACC_TOLERANCE:
+                changed.append((user_id, pp, acc))
+            else:
+                ctx.users_skipped += 1
 
-    if DEBUG:
-        print(f"Recalculated user ID {id} ({pp:.3f}pp, {acc:.3f}%)")
+            if user["priv"] & Privileges.UNRESTRICTED:
+                for key in (
+                    f"bancho:leaderboard:{mode.value}",
+                    f"bancho:leaderboard:{mode.value}:{user['country']}",
+                ):
+                    leaderboards.setdefault(key, {})[str(user_id)] = pp
 
+            if DEBUG:
+                print(f"Recalculated user ID {user_id} ({pp:.3f}pp, {acc:.3f}%)")
 
-async def process_user_chunk(
-    chunk: list[int],
-    game_mode: GameMode,
-    ctx: Context,
-) -> None:
-    tasks: list[Awaitable[None]] = []
-    for id in chunk:
-        tasks.append(recalculate_user(id, game_mode, ctx))
+        await update_stats(changed, mode, ctx)
+        ctx.users_changed += len(changed)
 
-    await asyncio.gather(*tasks)
+        if leaderboards:
+            async with ctx.redis.pipeline(transaction=False) as pipe:
+                for key, members in leaderboards.items():
+                    pipe.zadd(key, members)
 
+                await pipe.execute()
 
-async def recalculate_mode_users(mode: GameMode, ctx: Context) -> None:
-    user_ids = [
-        row["id"] for row in await ctx.database.fetch_all("SELECT id FROM users")
-    ]
 
-    for id_chunk in divide_chunks(user_ids, 100):
-        await process_user_chunk(id_chunk, mode, ctx)
+def load_checkpoint() -> tuple[GameMode, int] | None:
+    """Load the mode & last score id of an interrupted recalculation."""
+    if not CHECKPOINT_PATH.exists():
+        return None
 
+    checkpoint = json.loads(CHECKPOINT_PATH.read_text())
+    return GameMode(checkpoint["mode"]), checkpoint["last_id"]
 
-async def recalculate_mode_scores(mode: GameMode, ctx: Context) -> None:
-    scores = [
-        dict(row)
-        for row in await ctx.database.fetch_all(
-            """\
-            SELECT scores.id, scores.mode, scores.mods, scores.map_md5,
-              scores.pp, scores.acc, scores.max_combo,
-              scores.ngeki, scores.n300, scores.nkatu, scores.n100, scores.n50, scores.nmiss,
-              maps.id as `map_id`
-            FROM scores
-            INNER JOIN maps ON scores.map_md5 = maps.md5
-            WHERE scores.status = 2
-              AND scores.mode = :mode
-            ORDER BY scores.pp DESC
-            """,
-            {"mode": mode},
+
+def save_checkpoint(mode: GameMode, last_id: int) -> None:
+    """Save our progress, such that it can be resumed with --resume."""
+    # write & rename, so an interruption can't leave a partial file
+    tmp_path = CHECKPOINT_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({"mode": mode.value, "last_id": last_id}))
+    tmp_path.replace(CHECKPOINT_PATH)
+
+
+async def recalculate_score_batch(scores: list[dict[str, Any]], ctx: Context) -> None:
+    loop = asyncio.get_running_loop()
+
+    # each map's scores are calculated together in a worker process,
+    # with a few maps queued per worker so that none of them idle.
+    max_pending = 4 * ctx.workers
+    pending: set[asyncio.Future[tuple[list[tuple[int, float]], int]]] = set()
+    results: list[tuple[int, float]] = []
+
+    async def collect(return_when: str) -> None:
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=return_when)
+        for future in done:
+            changed, skipped = future.result()
+            results.extend(changed)
+            ctx.scores_changed += len(changed)
+            ctx.scores_skipped += skipped
+
+        if len(results) >= 1000:
+            await update_scores_pp(results, ctx)
+            results.clear()
+
+    scores.sort(key=lambda s: s["map_md5"])
+
+    for _, map_scores_iter in itertools.groupby(scores, key=lambda s: s["map_md5"]):
+        map_scores = list(map_scores_iter)
+        map_id = map_scores[0]["map_id"]
+
+        osu_file_available = await ensure_osu_file_is_available(
+            map_id,
+            expected_md5=map_scores[0]["map_md5"],
+        )
+        if not osu_file_available:
+            continue
+
+        if len(pending) >= max_pending:
+            await collect(asyncio.FIRST_COMPLETED)
+
+        pending.add(
+            loop.run_in_executor(
+                ctx.executor,
+                recalculate_map_scores,
+                str(BEATMAPS_PATH / f"{map_id}.osu"),
+                map_scores,
+            ),
         )
-    ]
 
-    for score_chunk in divide_chunks(scores, 100):
-        await process_score_chunk(score_chunk, ctx)
+    if pending:
+        await collect(asyncio.ALL_COMPLETED)
+
+    await update_scores_pp(results, ctx)
+
+
+async def recalculate_mode_scores(
+    mode: GameMode,
+    ctx: Context,
+    after_id: int = 0,
+) -> None:
+    """Recalculate a mode's scores in batches of ascending id, after `after_id`."""
+    last_id = after_id
+
+    while True:
+        scores = [
+            dict(row)
+            for row in await ctx.database.fetch_all(
+                """\
+                SELECT scores.id, scores.mode, scores.mods, scores.map_md5,
+                  scores.pp, scores.acc, scores.max_combo,
+                  scores.ngeki, scores.n300, scores.nkatu, scores.n100, scores.n50, scores.nmiss,
+                  maps.id as `map_id`
+                FROM scores
+                INNER JOIN maps ON scores.map_md5 = maps.md5
+                WHERE scores.status = 2
+                  AND scores.mode = :mode
+                  AND scores.id > :last_id
+                ORDER BY scores.id
+                LIMIT :batch_size
+                """,
+                {"mode": mode, "last_id": last_id, "batch_size": ctx.batch_size},
+            )
+        ]
+        if not scores:
+            break
+
+        await recalculate_score_batch(scores, ctx)
+
+        last_id = max(score["id"] for score in scores)
+        save_checkpoint(mode, last_id)
+
+        if DEBUG:
+            print(f"Recalculated {mode!r} scores up to ID {last_id}")
 
 
 async def main(argv: Sequence[str] | None = None) -> int:
@@ -238,6 +388,27 @@ async def main(argv: Sequence[str] | None = None) -> int:
         action="store_true",
     )
 
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="The number of processes to calculate scores with",
+        type=int,
+        default=os.cpu_count(),
+    )
+
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        help="The number of scores to fetch & recalculate at once",
+        type=int,
+        default=10_000,
+    )
+    parser.add_argument(
+        "--resume",
+        help="Resume from the checkpoint of an interrupted recalculation",
+        action="store_true",
+    )
+
     parser.add_argument(
         "-m",
         "--mode",
@@ -252,22 +423,58 @@ async def main(argv: Sequence[str] | None = None) -> int:
     global DEBUG
     DEBUG = args.debug
 
+    modes = [GameMode(int(mode)) for mode in args.mode]
+    after_id = 0
+
+    if args.resume:
+        checkpoint = load_checkpoint()
+        if checkpoint is None:
+            print("\x1b[;91mNo checkpoint to resume from\x1b[m")
+            return 1
+
+        checkpoint_mode, after_id = checkpoint
+        if checkpoint_mode not in modes:
+            print(f"\x1b[;91mCheckpoint is for mode {checkpoint_mode.value}\x1b[m")
+            return 1
+
+        # modes are recalculated in order; earlier ones have completed
+        modes = modes[modes.index(checkpoint_mode) :]
+
     db = databases.Database(app.settings.DB_DSN)
     await db.connect()
 
     redis = await aioredis.from_url(app.settings.REDIS_DSN)
 
-    ctx = Context(db, redis)
+    # forked, as the workers would otherwise re-run this
+    # script's setup (changing directories) on startup.
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("fork"),
+    )
 
-    for mode in args.mode:
-        mode = GameMode(int(mode))
+    ctx = Context(db, redis, executor, args.workers, args.batch_size)
 
+    for mode in modes:
         if not args.no_scores:
-            await recalculate_mode_scores(mode, ctx)
+            await recalculate_mode_scores(mode, ctx, after_id)
 
         if not args.no_stats:
             await recalculate_mode_users(mode, ctx)
 
+        print(
+            f"Recalculated {mode!r}: "
+            f"{ctx.scores_changed:,} scores changed, {ctx.scores_skipped:,} skipped; "
+            f"{ctx.users_changed:,} users changed, {ctx.users_skipped:,} skipped",
+        )
+
+        ctx.scores_changed = ctx.scores_skipped = 0
+        ctx.users_changed = ctx.users_skipped = 0
+        after_id = 0
+
+    CHECKPOINT_PATH.unlink(missing_ok=True)
+
+    executor.shutdown()
+
     await app.state.services.http_client.aclose()
     await db.disconnect()
     await redis.aclose()